@@ -0,0 +1,72 @@
+"""
+Compares loading the static catalog from SQLite with loading it from a compiled snapshot.
+
+Two numbers are measured for both sources: loading the catalog in a running process and the time a fresh
+process needs to get the rows, which includes importing the modules needed to read them.
+
+Run from the repository root::
+
+    python -m benchmarks.catalog_startup [repetitions]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from trucksimulator.resources import catalog, snapshot
+
+RESOURCES = os.path.dirname(snapshot.__file__)
+# what a worker does at startup, without importing the rest of the app
+FRESH_PROCESS = f"""
+import sys
+# already imported by flask and requests in a worker
+import hashlib
+sys.path.insert(0, {RESOURCES!r})
+import snapshot
+snapshot.load(sys.argv[1]) or snapshot.read_tables(sys.argv[1])
+"""
+
+
+def measure(function, repetitions: int) -> float:
+    """
+    :return: The median run time in milliseconds
+    """
+    timings = []
+    for _ in range(repetitions):
+        start = perf_counter()
+        function()
+        timings.append((perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def fresh_process(database: str) -> None:
+    subprocess.run([sys.executable, "-c", FRESH_PROCESS, database], check=True)
+
+
+def main(repetitions: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database = shutil.copy(catalog.PATH, directory)
+        empty = measure(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repetitions // 10)
+
+        in_process = {"SQLite": measure(lambda: catalog.load(database), repetitions)}
+        process = {"SQLite": measure(lambda: fresh_process(database), repetitions // 10) - empty}
+
+        snapshot.compile(database)
+        loaded = catalog.load(database)
+        assert [str(place) for place in loaded.places] == [str(place) for place in catalog.get().places]
+        in_process["snapshot"] = measure(lambda: catalog.load(database), repetitions)
+        process["snapshot"] = measure(lambda: fresh_process(database), repetitions // 10) - empty
+
+    for source in ("SQLite", "snapshot"):
+        print(f"{source:>8}: catalog.load {in_process[source]:7.3f} ms, fresh process {process[source]:7.3f} ms")
+    print(
+        f" speedup: catalog.load {in_process['SQLite'] / in_process['snapshot']:6.2f}x, "
+        f"fresh process {process['SQLite'] / process['snapshot']:6.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,309 @@
+"""
+Drives the web app through Flask's test client with synthetic Discord interactions and measures every handler.
+
+Every virtual user is a seeded player that repeats the same flow: ``/drive``, the profile, the toplist, a new job,
+loading and unloading an item, driving right and back, the slots, the company screen and the "Check company" user
+command. Signatures aren't validated and nothing is sent to Discord, like with ``--debug``.
+
+The benchmark needs a local database with the schema from database.sql, configured like for the bot itself. Its
+players have ids from 100000000000000000 on and are removed again afterwards. With the SQLite backend it runs without
+a database server. Run from the repository root::
+
+    python -m benchmarks.interactions [--users 8] [--concurrency 4] [--iterations 20] [--output results.json]
+    DATABASE_BACKEND=sqlite SQLITE_DATABASE=/tmp/benchmark.db python -m benchmarks.interactions
+    python -m benchmarks.interactions --compare results.json
+"""
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import threading
+from datetime import datetime, timezone
+from time import perf_counter
+
+from trucksimulator.resources import database, places, symbols
+
+FIRST_PLAYER_ID = 10**17
+ERROR_TITLE = "Looks like we got an error here."
+
+
+def percentile(timings: list[float], percent: float) -> float:
+    """
+    :return: The nearest-rank percentile of sorted timings
+    """
+    index = max(0, min(len(timings) - 1, round(percent / 100 * len(timings) + 0.5) - 1))
+    return timings[index]
+
+
+def get_start() -> places.Place:
+    """
+    :return: A place that produces an item and has room to drive to the right and back
+    """
+    return next(
+        place
+        for place in places.get_all()
+        if place.produced_item and symbols.RIGHT in symbols.get_drive_position_symbols(place.position)
+    )
+
+
+def seed(player_ids: list[str], start: places.Place) -> None:
+    """
+    Inserts the benchmark's players, each of them with an own company
+    """
+    cleanup(player_ids)
+    for player_id in player_ids:
+        database.execute(
+            "INSERT INTO players (id, name, discriminator, level, xp, money, position, miles, truck_miles, gas, "
+            "truck_id, loaded_items, company, last_vote) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            (player_id, f"bench{player_id[-4:]}", "0", 10, 0, 10**9, int(start.position), 0, 0, 10**6, 0, "", None, 0),
+        )
+        database.execute(
+            "INSERT INTO companies (name, description, logo, hq_position, founder, net_worth) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (f"Bench {player_id[-4:]}", "Benchmark company", "\U0001f69a", None, player_id, 0),
+        )
+        company = database.fetchone("SELECT id FROM companies WHERE founder=%s", (player_id,))
+        database.execute("UPDATE players SET company=%s WHERE id=%s", (company["id"], player_id))
+
+
+def cleanup(player_ids: list[str]) -> None:
+    """
+    Removes the benchmark's players and everything they left behind
+    """
+    placeholders = ", ".join(["%s"] * len(player_ids))
+    args = tuple(player_ids)
+    database.execute(f"UPDATE players SET company=NULL WHERE id IN ({placeholders})", args)
+    database.execute(f"DELETE FROM companies WHERE founder IN ({placeholders})", args)
+    database.execute(f"DELETE FROM jobs WHERE player_id IN ({placeholders})", args)
+    database.execute(f"DELETE FROM ledger WHERE player_id IN ({placeholders})", args)
+    database.execute(f"DELETE FROM players WHERE id IN ({placeholders})", args)
+
+
+def get_user(player_id: str) -> dict:
+    return {"id": player_id, "username": f"bench{player_id[-4:]}", "discriminator": "0", "avatar": None}
+
+
+def command(player_id: str, name: str, command_type: int = 1, target: str = None) -> dict:
+    """
+    :return: The interaction sent when a command is used
+    """
+    data = {"id": "0", "name": name, "type": command_type}
+    if target is not None:
+        data["target_id"] = target
+        data["resolved"] = {"users": {target: get_user(target)}}
+    return {"type": 2, "data": data}
+
+
+def component(custom_id: list, values: list = None) -> dict:
+    """
+    :return: The interaction sent when a button is clicked or a select menu option chosen
+    """
+    data = {"custom_id": "\n".join(str(part) for part in custom_id), "component_type": 2}
+    if values is not None:
+        data.update(component_type=3, values=values)
+    return {"type": 3, "data": data, "message": {"id": "0", "content": "", "embeds": [], "components": []}}
+
+
+def get_flow(player_id: str, start: places.Place) -> list[tuple[str, dict]]:
+    """
+    :return: The interactions a user sends in one iteration, with the name they are reported as
+    """
+    return [
+        ("/drive", command(player_id, "drive")),
+        ("home", component(["home", player_id])),
+        ("top", component(["top", player_id])),
+        ("job_new", component(["job_new", player_id])),
+        ("load", component(["load", player_id])),
+        ("unload_items", component(["unload_items", player_id], values=[start.produced_item])),
+        ("right", component([symbols.RIGHT, player_id])),
+        ("left", component([symbols.LEFT, player_id])),
+        ("slots", component(["slots", player_id, 10])),
+        ("manage_company", component(["manage_company", player_id])),
+        ("Check company", command(player_id, "Check company", command_type=2, target=player_id)),
+    ]
+
+
+def run_user(app, player_id: str, start: places.Place, iterations: int, results: dict, lock: threading.Lock) -> None:
+    """
+    Runs the flow of one user and adds the timings and errors to the results
+    """
+    client = app.test_client()
+    flow = get_flow(player_id, start)
+    timings: dict[str, list[float]] = {name: [] for name, _ in flow}
+    errors: dict[str, int] = {name: 0 for name, _ in flow}
+    for _ in range(iterations):
+        for name, interaction in flow:
+            payload = {
+                "id": "0",
+                "application_id": "0",
+                "token": "benchmark",
+                "locale": "en-US",
+                "guild_id": "0",
+                "member": {"user": get_user(player_id), "permissions": str(2**41 - 1)},
+                **interaction,
+            }
+            begin = perf_counter()
+            response = client.post("/interactions", json=payload)
+            timings[name].append(perf_counter() - begin)
+            body = response.get_json(silent=True) or {}
+            embeds = body.get("data", {}).get("embeds") or []
+            if response.status_code != 200 or any(embed.get("title") == ERROR_TITLE for embed in embeds):
+                errors[name] += 1
+        # a player can only have one job, the next iteration starts a new one
+        database.execute("DELETE FROM jobs WHERE player_id=%s", (player_id,))
+    with lock:
+        for name, handler_timings in timings.items():
+            results["timings"].setdefault(name, []).extend(handler_timings)
+            results["errors"][name] = results["errors"].get(name, 0) + errors[name]
+
+
+def summarize(timings: dict[str, list[float]], errors: dict[str, int], deferred_errors: int, duration: float) -> dict:
+    """
+    :param int deferred_errors: Errors of handlers that were deferred, their responses never reach the client
+    :return: Throughput and latencies in milliseconds, overall and per handler
+    """
+    handlers = {}
+    for name, handler_timings in timings.items():
+        handler_timings = sorted(handler_timings)
+        handlers[name] = {
+            "requests": len(handler_timings),
+            "errors": errors.get(name, 0),
+            "mean": statistics.fmean(handler_timings) * 1000,
+            "p50": percentile(handler_timings, 50) * 1000,
+            "p95": percentile(handler_timings, 95) * 1000,
+            "p99": percentile(handler_timings, 99) * 1000,
+        }
+    requests = sum(handler["requests"] for handler in handlers.values())
+    return {
+        "requests": requests,
+        "errors": sum(handler["errors"] for handler in handlers.values()) + deferred_errors,
+        "deferred_errors": deferred_errors,
+        "duration": duration,
+        "throughput": requests / duration,
+        "handlers": handlers,
+    }
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(summary: dict, previous: dict = None) -> None:
+    """
+    Prints a summary, with the relative change to a previous one if given
+    """
+
+    def change(value: float, old: float) -> str:
+        return f" ({(value - old) / old * 100:+6.1f}%)" if old else ""
+
+    old_handlers = previous["handlers"] if previous else {}
+    # every latency is followed by room for its change
+    titles = "".join(f"{title:>8}{'':10}" for title in ("p50 ms", "p95 ms", "p99 ms"))
+    print(f"{'handler':<16}{'requests':>9}{'errors':>7}{titles}")
+    for name, handler in summary["handlers"].items():
+        old = old_handlers.get(name, {})
+        print(
+            f"{name:<16}{handler['requests']:>9}{handler['errors']:>7}"
+            + "".join(f"{handler[key]:>8.2f}{change(handler[key], old.get(key)):<10}" for key in ("p50", "p95", "p99"))
+        )
+    old_throughput = previous["throughput"] if previous else None
+    print(
+        f"{summary['requests']} requests, {summary['errors']} errors, {summary['deferred_errors']} of them deferred, "
+        f"in {summary['duration']:.2f} s, "
+        f"{summary['throughput']:.1f} requests/s{change(summary['throughput'], old_throughput)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="number of seeded players")
+    parser.add_argument("--concurrency", type=int, default=4, help="users sending interactions at the same time")
+    parser.add_argument("--iterations", type=int, default=20, help="flows every user runs")
+    parser.add_argument("--warmup", type=int, default=1, help="flows run by every user before measuring")
+    parser.add_argument(
+        "--defer-after",
+        type=float,
+        default=0,
+        help="deferral threshold in seconds, 0 measures the handlers without the watchdog",
+    )
+    parser.add_argument("--output", help="file to write the results to as json")
+    parser.add_argument("--compare", help="results of a previous run to compare with")
+    args = parser.parse_args()
+
+    # imported here, loading the app takes a while and --help shouldn't have to wait
+    from trucksimulator.resources import deferral  # pylint: disable=import-outside-toplevel
+    from trucksimulator.server import app  # pylint: disable=import-outside-toplevel
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app.config["DONT_VALIDATE_SIGNATURE"] = True
+    app.config["DONT_REGISTER_WITH_DISCORD"] = True
+    deferral.watchdog.threshold = args.defer_after
+
+    start = get_start()
+    player_ids = [str(FIRST_PLAYER_ID + i) for i in range(args.users)]
+    seed(player_ids, start)
+    try:
+        lock = threading.Lock()
+        for _ in range(args.warmup):
+            for player_id in player_ids:
+                run_user(app, player_id, start, 1, {"timings": {}, "errors": {}}, lock)
+        deferral.watchdog.drain()
+        errors_before = deferral.watchdog.stats()["errors"]
+
+        results: dict = {"timings": {}, "errors": {}}
+        pending = list(player_ids)
+
+        def worker() -> None:
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    player_id = pending.pop()
+                run_user(app, player_id, start, args.iterations, results, lock)
+
+        threads = [threading.Thread(target=worker) for _ in range(min(args.concurrency, args.users))]
+        begin = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # deferred handlers are still running, their errors only show up in the watchdog's stats
+        deferral.watchdog.drain()
+        deferred_errors = deferral.watchdog.stats()["errors"] - errors_before
+        summary = summarize(results["timings"], results["errors"], deferred_errors, perf_counter() - begin)
+    finally:
+        cleanup(player_ids)
+
+    settings = {key: getattr(args, key) for key in ("users", "concurrency", "iterations", "warmup", "defer_after")}
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as compare_file:
+            previous = json.load(compare_file)
+        print(f"compared with {previous['commit']} from {previous['time']}")
+        if previous["settings"] != settings:
+            print(f"the previous run used different settings: {previous['settings']}")
+    print_summary(summary, previous)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(
+                {
+                    "commit": get_commit(),
+                    "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "settings": settings,
+                    **summary,
+                },
+                output_file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures the import time of the app's entry points with ``python -X importtime`` and checks them against a budget.
+An entry point is the code a task runs to load what it needs, e.g. ``--deploy`` imports the command modules through
+:mod:`trucksimulator.blueprints` after importing the CLI.
+
+Run from the repository root::
+
+    python -m benchmarks.startup [--runs 5] [--top 10]
+
+Exits with status 1 if an entry point takes longer to import than its budget.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# written to stderr before the entry point runs, the interpreter's own imports are listed before it
+MARKER = "startup benchmark"
+
+# entry point: (code that loads it, budget in milliseconds)
+ENTRY_POINTS = {
+    "package": ("import trucksimulator", 50),
+    "cli": ("import trucksimulator.__main__", 400),
+    "deploy": (
+        "from trucksimulator import __main__, blueprints; blueprints.get_global(); blueprints.get_admin()",
+        1000,
+    ),
+    "server": ("import trucksimulator.server", 1000),
+}
+
+
+def importtime(code: str) -> tuple[float, dict[str, float]]:
+    """
+    Runs an entry point in a fresh interpreter
+
+    :param str code: The code that loads the entry point
+    :return: The time spent importing modules while the code ran and the cumulative time of the modules imported
+        by each of them directly, in milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import os; os.write(2, b'{MARKER}\\n'); {code}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.splitlines()
+    if MARKER not in lines:
+        raise RuntimeError(f"{code} didn't run")
+    total = 0.0
+    children: dict[str, float] = {}
+    for line in lines[lines.index(MARKER) + 1 :]:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # nested imports are indented by two spaces per level, modules imported by functions aren't nested
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            total += int(cumulative) / 1000
+    return total, children
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="imports per entry point, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest direct imports to show")
+    args = parser.parse_args()
+
+    over_budget = False
+    for entry_point, (code, budget) in ENTRY_POINTS.items():
+        runs = [importtime(code) for _ in range(args.runs)]
+        total = statistics.median(run[0] for run in runs)
+        status = "ok" if total <= budget else "OVER BUDGET"
+        over_budget = over_budget or total > budget
+        print(f"{entry_point} ({code}): {total:.1f} ms, budget {budget} ms, {status}")
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[: args.top]
+        for name, cumulative in slowest:  # of the last run
+            print(f"    {cumulative:8.1f} ms  {name}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,23 @@ CREATE TABLE `jobs` (
   UNIQUE KEY `player_id` (`player_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=latin1;
 
+--
+-- Table structure for table `ledger`
+--
+
+DROP TABLE IF EXISTS `ledger`;
+CREATE TABLE `ledger` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `player_id` varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `amount` int(11) NOT NULL,
+  `reason` varchar(32) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `counterparty` varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `time` int(11) NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `player_time` (`player_id`,`time`),
+  KEY `counterparty_time` (`counterparty`,`time`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 --
 -- Table structure for table `players`
 --
@@ -55,5 +72,8 @@ CREATE TABLE `players` (
   PRIMARY KEY (`id`),
   UNIQUE KEY `id` (`id`),
   KEY `company` (`company`),
+  KEY `level_xp_id` (`level`,`xp`,`id`),
+  KEY `money` (`money`),
+  KEY `miles` (`miles`),
   CONSTRAINT `players_ibfk_1` FOREIGN KEY (`company`) REFERENCES `companies` (`id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -1,11 +1,10 @@
-{ buildPythonPackage, fetchPypi, python-i18n, mysql-connector, gunicorn, pyyaml, flask, requests, requests-toolbelt, pynacl, pytest, python, setuptools, ... }:
+{ buildPythonPackage, fetchPypi, mysql-connector, gunicorn, pyyaml, flask, requests, requests-toolbelt, pynacl, pytest, python, setuptools, ... }:
 
 buildPythonPackage {
   name = "TruckSimulatorBot";
   src = ./trucksimulator;
 
   propagatedBuildInputs = [
-    python-i18n
     mysql-connector
     gunicorn
     pyyaml
@@ -37,6 +36,7 @@ buildPythonPackage {
     runHook preInstall
     mkdir -p $out/${python.sitePackages}
     cp -r . $out/${python.sitePackages}/trucksimulator
+    ${python.interpreter} $out/${python.sitePackages}/trucksimulator/resources/snapshot.py $out/${python.sitePackages}/trucksimulator/resources/objects.db
     runHook postInstall '';
 
   shellHook = "export FLASK_APP=trucksimulator";
@@ -1,4 +1,4 @@
-{ lib, stdenv, buildPythonPackage, sphinx, python-i18n, mysql-connector, pyyaml, gunicorn, flask, requests, requests-toolbelt, pynacl, pytest, fetchPypi, setuptools, poetry-core, ... }:
+{ lib, stdenv, buildPythonPackage, sphinx, mysql-connector, pyyaml, gunicorn, flask, requests, requests-toolbelt, pynacl, pytest, fetchPypi, setuptools, poetry-core, ... }:
 
 
 stdenv.mkDerivation {
@@ -20,7 +20,6 @@ stdenv.mkDerivation {
         };
       })
 
-    python-i18n
     mysql-connector
     gunicorn
     pyyaml
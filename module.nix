@@ -83,11 +83,14 @@ in
         MYSQL_USER = cfg.database.user;
         MYSQL_DATABASE = cfg.database.name;
         MYSQL_SOCKET = cfg.database.socketPath;
+        METRICS_DIR = "/run/trucksimulator-metrics";
 
       };
       serviceConfig = {
         DynamicUser = true;
-        ExecStart = "${appEnv}/bin/gunicorn trucksimulator:app -b /run/trucksimulator/app.sock --error-logfile -";
+        RuntimeDirectory = "trucksimulator-metrics";
+        ExecStartPre = "${appEnv}/bin/python -m trucksimulator --migrate";
+        ExecStart = "${appEnv}/bin/gunicorn -c python:trucksimulator.gunicorn_config trucksimulator:app -b /run/trucksimulator/app.sock --error-logfile -";
       };
     };
     systemd.sockets.trucksimulator-images = {
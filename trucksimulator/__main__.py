@@ -0,0 +1,73 @@
+"""
+Command line entry point. The tasks that sync the commands with Discord only load the blueprints they deploy,
+not the web app::
+
+    python -m trucksimulator --deploy         # deploys all global commands
+    python -m trucksimulator --admin          # deploys the admin commands in the support guild
+    python -m trucksimulator --clear-admin    # removes the commands from the support guild
+    python -m trucksimulator --remove-global  # removes all global commands
+    python -m trucksimulator --migrate        # brings an existing database up to date
+    python -m trucksimulator [--debug]        # runs the development server
+"""
+import argparse
+
+from flask import Flask
+from flask_discord_interactions import DiscordInteractions
+
+from trucksimulator import blueprints, config
+
+
+def get_discord() -> DiscordInteractions:
+    """
+    :return: An interactions instance without any commands, only used to sync commands
+    """
+    app = Flask(__name__)
+    app.config["DISCORD_CLIENT_ID"] = config.Discord.CLIENT_ID
+    app.config["DISCORD_BASE_URL"] = config.Discord.BASE_URL
+    app.config["DISCORD_CLIENT_SECRET"] = config.Discord.CLIENT_SECRET
+    return DiscordInteractions(app)
+
+
+def main() -> None:
+    """
+    Runs the task chosen on the command line. Deploying imports the blueprints for their command definitions, the
+    catalog and the database are only loaded by the handlers and never touched.
+    """
+    parser = argparse.ArgumentParser(prog="python -m trucksimulator", description="The Truck Simulator bot.")
+    tasks = parser.add_mutually_exclusive_group()
+    tasks.add_argument("--deploy", action="store_true", help="deploy all global commands")
+    tasks.add_argument("--admin", action="store_true", help="deploy the admin commands in the support guild")
+    tasks.add_argument("--clear-admin", action="store_true", help="remove the commands from the support guild")
+    tasks.add_argument("--remove-global", action="store_true", help="remove all global commands")
+    tasks.add_argument("--migrate", action="store_true", help="run the database migrations")
+    tasks.add_argument("--debug", action="store_true", help="run the development server without signature checks")
+    args = parser.parse_args()
+
+    if args.migrate:
+        # pylint: disable=import-outside-toplevel
+        from trucksimulator.resources import database
+
+        database.migrate()
+        return
+
+    discord = get_discord()
+    if args.deploy:
+        for blueprint in blueprints.get_global():
+            discord.register_blueprint(blueprint)
+        discord.update_commands()
+    elif args.admin:
+        discord.register_blueprint(blueprints.get_admin())
+        discord.update_commands(guild_id=config.Guilds.SUPPORT)
+    elif args.clear_admin:
+        discord.update_commands(guild_id=config.Guilds.SUPPORT)
+    elif args.remove_global:
+        discord.update_commands()
+    else:
+        # pylint: disable=import-outside-toplevel
+        from trucksimulator.server import app
+
+        app.run(port=9001, debug=True)
+
+
+if __name__ == "__main__":
+    main()
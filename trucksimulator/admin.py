@@ -1,16 +1,12 @@
 "Blueprint file containing commands locked to the bot admins"
 # pylint: disable=unused-argument,broad-except
 import json
-from threading import Thread
-
-import requests
 
 from trucksimulator import config
-import mysql.connector
 from flask_discord_interactions import DiscordInteractionsBlueprint, User
 from flask_discord_interactions.context import Context
 from flask_discord_interactions.models.message import Embed, Message
-from trucksimulator.resources import players
+from trucksimulator.resources import content, database, followups, players, templates
 
 admin_bp = DiscordInteractionsBlueprint()
 
@@ -24,13 +20,10 @@ def sql(ctx: Context, query: str):
     if ctx.author.id != config.Users.ADMIN:
         return "Wait. You shouldn't be able to even read this. Something is messed up."
     try:
-        with mysql.connector.connect(**config.DATABASE_ARGS) as con:
-            with con.cursor(dictionary=True) as cur:
-                cur.execute(query)
-                if cur.rowcount != 0:
-                    con.commit()
-                    return f"`Done. {cur.rowcount} row(s) affected`"
-                return f"```json\n{json.dumps(cur.fetchall(), indent=2)}```"
+        rowcount, rows = database.run_statement(query)
+        if rows is None:
+            return f"`Done. {rowcount} row(s) affected`"
+        return f"```json\n{json.dumps(rows, indent=2, default=str)}```"
     except Exception as error:
         return "Error: " + str(error)
 
@@ -68,6 +61,7 @@ def remove(ctx: Context, user: User):
         return Message("That Player is not on the blacklist.", ephemeral=True)
     except players.PlayerBlacklisted:
         player = players.Player(user.id, user.username, user.discriminator)
+        player.attach()
         player.xp = 0
         player.name = user.username
         return Message(
@@ -99,8 +93,25 @@ def ping(ctx: Context) -> str:
     start_time = int(ctx.id) >> 22
 
     def measure_time():
-        end_time = int(requests.get(ctx.followup_url(message="@original")).json()["id"]) >> 22
-        ctx.edit(Message(f"Pong ({end_time - start_time} ms)"))
+        response = followups.executor.request("GET", ctx.followup_url(message="@original"))
+        end_time = int(response.json()["id"]) >> 22
+        followups.executor.request(
+            "PATCH", ctx.followup_url(message="@original"), **followups.payload(f"Pong ({end_time - start_time} ms)")
+        )
 
-    Thread(target=measure_time).start()
+    followups.submit(measure_time)
     return "Pong"
+
+
+@admin_bp.command(name="reload", default_member_permissions=8)
+def reload_content(ctx: Context) -> Message:
+    """Reloads the guide and all messages."""
+    if ctx.author.id != config.Users.ADMIN:
+        return Message("Wait. You shouldn't be able to even read this. Something is messed up.", ephemeral=True)
+    store = content.reload()
+    # the guide selects list the topics
+    templates.clear()
+    return Message(
+        f"`Done. Loaded {len(store.topics)} guide topic(s) and {len(store.messages)} message(s) in this worker`",
+        ephemeral=True,
+    )
@@ -0,0 +1,31 @@
+"""
+The blueprints that make up the bot. They are imported on first use, tasks that don't need the commands
+don't load them.
+"""
+# pylint: disable=import-outside-toplevel
+from flask_discord_interactions import DiscordInteractionsBlueprint
+
+
+def get_global() -> list[DiscordInteractionsBlueprint]:
+    """
+    :return: All blueprints whose commands are deployed globally, in registration order
+    """
+    from trucksimulator.companies import company_bp
+    from trucksimulator.driving import driving_bp
+    from trucksimulator.economy import economy_bp
+    from trucksimulator.gambling import gambling_bp
+    from trucksimulator.guide import guide_bp
+    from trucksimulator.stats import profile_bp
+    from trucksimulator.system import system_bp
+    from trucksimulator.truck import truck_bp
+
+    return [system_bp, profile_bp, driving_bp, economy_bp, gambling_bp, guide_bp, truck_bp, company_bp]
+
+
+def get_admin() -> DiscordInteractionsBlueprint:
+    """
+    :return: The blueprint of the admin commands, only deployed in the support guild
+    """
+    from trucksimulator.admin import admin_bp
+
+    return admin_bp
@@ -14,8 +14,8 @@ from flask_discord_interactions import (
 )
 from flask_discord_interactions.models.component import ActionRow, Button, Component, TextInput
 from flask_discord_interactions.models.embed import Author, Field, Footer, Media
-from i18n import t
-from trucksimulator.resources import companies, components, places, players, symbols
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import companies, components, deferral, places, players, symbols
 from trucksimulator.utils import get_localizations
 
 company_bp = DiscordInteractionsBlueprint()
@@ -73,14 +73,15 @@ def back(ctx: Context, player_id: str):
 
 
 @company_bp.custom_handler(custom_id="company_found")
+@deferral.immediate
 def found(ctx: Context, player_id: str):
     """Returns a modal to found a company"""
     player = players.get(ctx.author.id, check=player_id)
     if player.company is not None:
         return Message(t("company.founding.errors.already_existing"), ephemeral=True)
     if (
-        int(player.position) in [int(p.position) for p in places.get_all()]
-        or int(player.position) in [int(c.hq_position) for c in companies.get_all()]
+        places.get(player.position) is not None
+        or companies.get_headquarter(player.position) is not None
         or int(player.position) == 0
     ):
         return Message(t("company.founding.errors.wrong_position"), ephemeral=True)
@@ -269,6 +270,7 @@ def confirm_leave(ctx: Context, player_id: str):
 
 
 @company_bp.custom_handler(custom_id="company_update")
+@deferral.immediate
 def company_update(ctx: Context, player_id: str):
     """A button handler that promts a select to select the options than should be changed"""
     player = players.get(ctx.author.id, check=player_id)
@@ -2,8 +2,8 @@
 "Some configuration values"
 from os import getenv
 
-from i18n import t
 import pathlib
+import tempfile
 
 MAP_BORDER = 25
 LOG_FORMAT = "%(levelname)s [%(module)s.%(funcName)s]: %(message)s"
@@ -18,6 +18,9 @@ def info_links() -> list:
     """
     :return: the link buttons as a list
     """
+    # imported here, the translations need this module to load
+    from trucksimulator.resources.translations import t  # pylint: disable=import-outside-toplevel
+
     return [
         {
             "name": t("info.links.support"),
@@ -59,6 +62,70 @@ DATABASE_ARGS = {
 }
 
 
+class Database:
+    "The database backend, ``mysql`` or ``sqlite``. MySQL is configured with DATABASE_ARGS"
+    BACKEND = getenv("DATABASE_BACKEND", default="mysql")
+    SQLITE_PATH = getenv("SQLITE_DATABASE", default="trucksimulator.db")
+    # seconds a write waits for another connection's transaction
+    SQLITE_TIMEOUT = float(getenv("SQLITE_TIMEOUT", default="5"))
+    # the MySQL dump SQLite databases are created from
+    SCHEMA = getenv("DATABASE_SCHEMA", default=str(pathlib.Path(BASE_PATH).parent / "database.sql"))
+
+
+class DatabasePool:
+    "Database connection pool sizing, per worker process"
+    SIZE = int(getenv("MYSQL_POOL_SIZE", default="4"))
+    TIMEOUT = float(getenv("MYSQL_POOL_TIMEOUT", default="5"))
+    PING_INTERVAL = float(getenv("MYSQL_POOL_PING_INTERVAL", default="30"))
+
+
+class QueryLog:
+    "Interactions using the database more than this are logged"
+    MAX_QUERIES = int(getenv("QUERY_LOG_MAX_QUERIES", default="15"))
+    MAX_TIME = float(getenv("QUERY_LOG_MAX_TIME", default="0.2"))
+
+
+class Metrics:
+    "Prometheus metrics, every worker process writes its values to files in this directory"
+    DIRECTORY = getenv("METRICS_DIR", default=f"{tempfile.gettempdir()}/trucksimulator-metrics")
+    # /metrics is served here by the gunicorn master, never by the app behind the proxy
+    ADDRESS = getenv("METRICS_ADDRESS", default="127.0.0.1:9102")
+
+
+class Followups:
+    "Background delivery of follow-up messages, per worker process"
+    WORKERS = int(getenv("FOLLOWUP_WORKERS", default="4"))
+    QUEUE_SIZE = int(getenv("FOLLOWUP_QUEUE_SIZE", default="100"))
+    RETRIES = int(getenv("FOLLOWUP_RETRIES", default="3"))
+    BACKOFF = float(getenv("FOLLOWUP_BACKOFF", default="0.5"))
+    TIMEOUT = float(getenv("FOLLOWUP_TIMEOUT", default="10"))
+
+
+class Deferral:
+    "Answering interactions within Discord's 3 second deadline, per worker process"
+    THRESHOLD = float(getenv("DEFER_AFTER", default="2"))
+    # at most one per database connection
+    WORKERS = int(getenv("DEFER_WORKERS", default=str(DatabasePool.SIZE)))
+    QUEUE_SIZE = int(getenv("DEFER_QUEUE_SIZE", default="16"))
+
+
+class Caches:
+    "Lifetimes of in-process caches, in seconds"
+    HEADQUARTERS_TTL = float(getenv("HEADQUARTERS_CACHE_TTL", default="30"))
+    LEADERBOARD_MAX_AGE = int(getenv("LEADERBOARD_MAX_AGE", default="60"))
+    # how often objects.db is checked for changes
+    CATALOG_CHECK_INTERVAL = float(getenv("CATALOG_CHECK_INTERVAL", default="10"))
+
+
+class Discord:
+    "Credentials of the Discord application"
+    CLIENT_ID = getenv("DISCORD_CLIENT_ID", default="")
+    # follow-ups and command syncs go here, can point to a local stub of the webhook endpoints
+    BASE_URL = getenv("DISCORD_BASE_URL", default="https://discord.com/api/v10")
+    PUBLIC_KEY = getenv("DISCORD_PUBLIC_KEY", default="")
+    CLIENT_SECRET = getenv("DISCORD_CLIENT_SECRET", default="")
+
+
 class Guilds:
     "Guild id used for command registration"
     SUPPORT = "839580174282260510"
@@ -1,6 +1,5 @@
 "Blueprint file containing all driving-related commands and handlers"
 # pylint: disable=missing-function-docstring
-import threading
 from random import randint
 
 from trucksimulator import config
@@ -13,14 +12,17 @@ from flask_discord_interactions.models.component import (
     SelectMenuOption,
 )
 from flask_discord_interactions.models.embed import Author, Field, Footer, Media
-from i18n import t
+from trucksimulator.resources.translations import t
 from trucksimulator.resources import (
     assets,
     companies,
     components,
+    followups,
     items,
     jobs,
     levels,
+    minimap,
+    money,
     places,
     players,
     symbols,
@@ -35,7 +37,7 @@ driving_bp = DiscordInteractionsBlueprint()
 def get_drive_embeds(player: players.Player, avatar_url: str) -> list:
     """Returns the drive embed that includes all the information about the current position and gas"""
     place = places.get(player.position)
-    all_companies = companies.get_all()
+    headquarters = companies.get_headquarters()
     image_embed = Embed(
         color=config.EMBED_COLOR,
     )
@@ -51,7 +53,7 @@ def get_drive_embeds(player: players.Player, avatar_url: str) -> list:
     drive_embed.fields.append(
         Field(
             name=t("driving.minimap"),
-            value=generate_minimap(player, all_companies),
+            value=generate_minimap(player, headquarters),
             inline=True,
         )
     )
@@ -89,66 +91,25 @@ def get_drive_embeds(player: players.Player, avatar_url: str) -> list:
             )  # done like this to save loading time. 5 different images will be cached altought being different for every player
         )
     drive_embed.image = Media(url=assets.get("/transparent"))
-    if int(player.position) in [int(c.hq_position) for c in all_companies]:
-        for company in all_companies:
-            if int(company.hq_position) == int(player.position):
-                drive_embed.fields.append(
-                    Field(
-                        name=t("driving.info.title"),
-                        value=t("driving.info.company", name=f"{company.logo} **{company}**"),
-                    )
-                )
+    company = headquarters.get(int(player.position))
+    if company is not None:
+        drive_embed.fields.append(
+            Field(
+                name=t("driving.info.title"),
+                value=t("driving.info.company", name=f"{company.logo} **{company}**"),
+            )
+        )
     return [image_embed, drive_embed]
 
 
-def generate_minimap(player: players.Player, all_companies: list[companies.Company]) -> str:
+def generate_minimap(player: players.Player, headquarters: dict) -> str:
     """Generate the minimap shown in /drive"""
-    minimap_array = []
-    for i in range(0, 7):
-        minimap_array.append([])
-        for j in range(0, 7):
-            minimap_array[i].append("")
-            position = Position(player.position.x - 3 + j, player.position.y + 3 - i)
-            map_place = places.get(position)
-            # Show the place's item
-            if map_place:
-                minimap_array[i][j] = f"<:i:{items.get(map_place.produced_item).emoji}>"
-            # Show other company locos
-            elif int(position) in [int(c.hq_position) for c in all_companies]:
-                for company in all_companies:
-                    if int(company.hq_position) == int(position):
-                        minimap_array[i][j] = company.logo
-            elif position.x in [-1, config.MAP_BORDER + 1] or position.y in [
-                -1,
-                config.MAP_BORDER + 1,
-            ]:
-                # Mark the map border with symbols
-                minimap_array[i][j] = ":small_orange_diamond:"
-                if (
-                    # Small correction mechanism to prevent the lines from going beyond the border
-                    position.x < -1
-                    or position.x > config.MAP_BORDER + 1
-                    or position.y < -1
-                    or position.y > config.MAP_BORDER + 1
-                ):
-                    minimap_array[i][j] = symbols.MAP_BACKGROUND
-            else:
-                minimap_array[i][j] = symbols.MAP_BACKGROUND
-
-    # own truck in the middle
-    minimap_array[3][3] = trucks.get(player.truck_id).emoji
-    # build the actual map
-    minimap = ""
-    for i in range(0, 7):
-        for j in range(0, 7):
-            minimap = minimap + minimap_array[i][j]
-        minimap = minimap + "\n"
-    return minimap
+    return minimap.render(player.position, trucks.get(player.truck_id).emoji, headquarters)
 
 
 @driving_bp.custom_handler(custom_id="load")
 def load(ctx: Context, player_id: str):
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
 
     item = items.get(places.get(player.position).produced_item)
     if item.name not in [i.name for i in player.loaded_items]:
@@ -157,9 +118,8 @@ def load(ctx: Context, player_id: str):
 
     current_job = player.get_job()
     if current_job is not None and item.name == current_job.place_from.produced_item:
-        current_job.state = jobs.STATE_LOADED
+        player.update_job(current_job, state=jobs.STATE_LOADED)
         job_message = jobs.get_state(current_job)
-        player.update_job(current_job, state=current_job.state)
 
     drive_embeds = get_drive_embeds(player, ctx.author.avatar_url)
     drive_embeds[1].fields.append(
@@ -191,7 +151,7 @@ def load(ctx: Context, player_id: str):
 
 @driving_bp.custom_handler(custom_id="unload")
 def unload(ctx: Context, player_id: str):
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
     current_job = player.get_job()
 
     item_options: list[SelectMenuOption] = []
@@ -226,7 +186,7 @@ def unload(ctx: Context, player_id: str):
 
 @driving_bp.custom_handler(custom_id="unload_items")
 def unload_items(ctx: Context, player_id: str):
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
 
     item_string = ""
     for name in ctx.values:
@@ -257,9 +217,9 @@ def unload_items(ctx: Context, player_id: str):
         and current_job.place_from.produced_item in ctx.values
         and int(player.position) == int(current_job.place_to.position)
     ):
-        current_job.state = jobs.STATE_DONE
-        player.add_money(current_job.reward)
         player.remove_job(current_job)
+        current_job.state = jobs.STATE_DONE
+        money.credit(player, current_job.reward, money.REASON_JOB)
         job_message = jobs.get_state(current_job) + player.add_xp(levels.get_job_reward_xp(player.level))
         if player.company is not None:
             company = companies.get(player.company)
@@ -284,7 +244,7 @@ def unload_items(ctx: Context, player_id: str):
 
     # add a notification embed if a minijob is done
     if place.accepted_item in ctx.values and place.item_reward:
-        player.add_money(place.item_reward)
+        money.credit(player, place.item_reward, money.REASON_MINIJOB)
         drive_embeds.append(
             Embed(
                 title=t("minijob.notification"),
@@ -307,7 +267,7 @@ def unload_items(ctx: Context, player_id: str):
 
 @driving_bp.custom_handler(custom_id="cancel")
 def cancel(ctx: Context, player_id: str):
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
     return Message(
         embeds=get_drive_embeds(player, ctx.author.avatar_url),
         components=components.get_drive_buttons(player),
@@ -317,7 +277,7 @@ def cancel(ctx: Context, player_id: str):
 
 @driving_bp.custom_handler(custom_id="job_new")
 def new_job(ctx: Context, player_id: str) -> Message:
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
     job_embed = Embed(
         color=config.EMBED_COLOR,
         author=Author(name=t("job.title", player=player.name)),
@@ -365,25 +325,8 @@ def right(ctx: Context, player_id: str):
 
 def move(ctx: Context, direction, player_id):
     """Centralized function for all the directional buttons"""
-    player = players.get(ctx.author.id, check=player_id)
-
-    new_position = player.position
-    if direction == symbols.LEFT:
-        new_position.x -= 1
-
-    if direction == symbols.UP:
-        new_position.y += 1
-
-    if direction == symbols.DOWN:
-        new_position.y -= 1
-
-    if direction == symbols.RIGHT:
-        new_position.x += 1
-
-    player.miles += 1
-    player.truck_miles += 1
-    player.gas -= trucks.get(player.truck_id).gas_consumption
-    player.position = new_position
+    player = players.get_driving(ctx.author.id, check=player_id)
+    player.move(direction)
 
     if player.gas <= 0:
         return Message(
@@ -428,7 +371,7 @@ def move(ctx: Context, direction, player_id):
 def event_hitchhike(ctx: Context, player_id: str) -> Message:
     player = players.get(ctx.author.id, check=player_id)
     try:
-        player.debit_money(3000)
+        money.debit(player, 3000, money.REASON_HITCHHIKE)
     except players.NotEnoughMoney:
         pass
     if randint(0, 1) == 0:
@@ -467,7 +410,7 @@ def event_walk(ctx: Context, player_id: str) -> Message:
 def event_rob(ctx: Context, player_id: str) -> Message:
     player = players.get(ctx.author.id, check=player_id)
     if randint(0, 1) == 0:
-        player.gas += 250
+        player.increment(gas=250)
         return Message(
             "Phew. Nobdody looked and you stole some gas. Be careful next time.",
             components=[ActionRow(components=[components.back_to_road(player.id)])],
@@ -482,7 +425,7 @@ def event_rob(ctx: Context, player_id: str) -> Message:
 
 @driving_bp.custom_handler(custom_id="continue_drive")
 def continue_drive(ctx: Context, player_id: str):
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
     return Message(
         embeds=get_drive_embeds(player, ctx.author.avatar_url),
         components=components.get_drive_buttons(player),
@@ -493,19 +436,18 @@ def continue_drive(ctx: Context, player_id: str):
 @driving_bp.custom_handler(custom_id="initial_drive")
 def initial_drive(ctx: Context, player_id: str = None):
     if player_id:
-        player = players.get(ctx.author.id, check=player_id)
+        player = players.get_driving(ctx.author.id, check=player_id)
     else:
-        player = players.get(ctx.author.id)
+        player = players.get_driving(ctx.author.id)
 
-    def start_drive():
-        ctx.send(
-            Message(
-                embeds=get_drive_embeds(player, ctx.author.avatar_url),
-                components=components.get_drive_buttons(player),
-            )
-        )
-
-    threading.Thread(target=start_drive).start()
+    drive_message = Message(
+        embeds=get_drive_embeds(player, ctx.author.avatar_url),
+        components=components.get_drive_buttons(player),
+    )
+    if not followups.send(ctx, drive_message):
+        # too busy to send a follow-up, show the drive in place of the original message
+        drive_message.update = True
+        return drive_message
     return Message(
         content=ctx.message.content,
         embeds=ctx.message.embeds,
@@ -522,7 +464,7 @@ def initial_drive(ctx: Context, player_id: str = None):
 )
 def drive(ctx: Context) -> Message:
     """Starts the game."""
-    player = players.get(ctx.author.id)
+    player = players.get_driving(ctx.author.id)
     # Detect, when the player is renamed
     if player.name != ctx.author.username:
         player.name = ctx.author.username
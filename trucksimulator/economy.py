@@ -11,8 +11,8 @@ from flask_discord_interactions import (
 from flask_discord_interactions.models.embed import Author, Field
 from flask_discord_interactions.models.option import CommandOptionType, Option
 from flask_discord_interactions.models.user import User
-from i18n import t
-from trucksimulator.resources import items, jobs, levels, players, trucks
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import items, jobs, levels, money, players, trucks
 from trucksimulator.resources.autocompletes import amount_all
 from trucksimulator.utils import commatize, get_localizations
 
@@ -21,7 +21,7 @@ economy_bp = DiscordInteractionsBlueprint()
 
 @economy_bp.custom_handler(custom_id="job_show")
 def show_job(ctx: Context, player_id: str) -> Message:
-    player = players.get(player_id)
+    player = players.get_driving(player_id)
 
     current_job = player.get_job()
     if current_job is None:
@@ -51,12 +51,12 @@ def refill(ctx: Context, player_id: str):
     price = round(gas_amount * 1.2)
 
     try:
-        player.debit_money(price)
+        money.debit(player, price, money.REASON_REFILL)
     except players.NotEnoughMoney:
         if player.gas < 170:
             if player.level > 2:
                 player.level -= 2
-            player.gas += 100
+            player.increment(gas=100)
             player.xp = 0
             return Message(
                 t("refill.not_enough_money.deal", player_id=ctx.author.id),
@@ -135,8 +135,7 @@ def give(ctx: Context, user: User, amount: int) -> Message:
             )
         )
 
-    donator.debit_money(amount)
-    acceptor.add_money(amount)
+    money.transfer(donator, acceptor, amount)
     return Message(
         embed=Embed(
             description=t(
@@ -18,8 +18,8 @@ from flask_discord_interactions.models.component import (
 )
 from flask_discord_interactions.models.embed import Author, Field, Media
 from flask_discord_interactions.models.modal import Modal
-from i18n import t
-from trucksimulator.resources import assets, components, items, players
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import assets, components, deferral, items, money, players
 from trucksimulator.utils import commatize
 
 gambling_bp = DiscordInteractionsBlueprint()
@@ -40,9 +40,16 @@ def casino(ctx: Context, player_id: str) -> Message:
 
 
 def get_slots_embed(player: players.Player, amount: int) -> Embed:
-    player.debit_money(amount)
-
     chosen_items = choices(sample(items.get_all(), 8), k=3)
+    if chosen_items.count(chosen_items[0]) == 3:
+        payout = amount * 11
+    elif chosen_items.count(chosen_items[0]) == 2 or chosen_items.count(chosen_items[1]) == 2:
+        payout = amount * 2
+    else:
+        payout = 0
+    # stake and payout are settled in one statement
+    money.wager(player, amount, payout, money.REASON_SLOTS)
+
     machine = "<|"
     for item in chosen_items:
         machine += f"<:n:{item.emoji}>"
@@ -63,7 +70,6 @@ def get_slots_embed(player: players.Player, amount: int) -> Embed:
                 value=t("casino.slots.result.win3", amount=commatize(amount * 10)),
             )
         )
-        player.add_money(amount * 11)
     elif chosen_items.count(chosen_items[0]) == 2 or chosen_items.count(chosen_items[1]) == 2:
         slots_embed.fields.append(
             Field(
@@ -71,7 +77,6 @@ def get_slots_embed(player: players.Player, amount: int) -> Embed:
                 value=t("casino.slots.result.win2", amount=commatize(amount)),
             )
         )
-        player.add_money(amount * 2)
     else:
         slots_embed.fields.append(
             Field(
@@ -104,6 +109,7 @@ def get_slots_components(player: players.Player, amount: int) -> list:
 
 
 @gambling_bp.custom_handler(custom_id="slots_init")
+@deferral.immediate
 def slots_modal(ctx: Context, player_id):
     player = players.get(ctx.author.id, check=player_id)
     return Modal(
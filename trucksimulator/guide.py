@@ -1,7 +1,5 @@
 "Blueprint file containing the guide command and its component handlers"
 # pylint: disable=unused-argument
-from os import listdir
-
 from flask_discord_interactions import (
     Context,
     DiscordInteractionsBlueprint,
@@ -16,10 +14,10 @@ from flask_discord_interactions.models.component import (
 )
 from flask_discord_interactions.models.embed import Author, Field, Media
 from flask_discord_interactions.models.option import CommandOptionType, Option
-from i18n import t
+from trucksimulator.resources.translations import t
 
 from trucksimulator import config
-from trucksimulator.resources import assets, items, places, players, symbols
+from trucksimulator.resources import assets, content, items, places, players, symbols, templates, translations
 from trucksimulator.utils import get_localizations
 
 guide_bp = DiscordInteractionsBlueprint()
@@ -58,9 +56,8 @@ def iteminfo(ctx: Context) -> Message:
         thumbnail=Media(url=f"https://cdn.discordapp.com/emojis/{requested_item.emoji}.webp"),
         fields=[],
     )
-    for place in places.get_all():
-        if place.produced_item == requested_item.name:
-            item_embed.fields.append(Field(name="Found at", value=place.name))
+    for place in places.get_producing(requested_item.name):
+        item_embed.fields.append(Field(name="Found at", value=place.name))
     return Message(embed=item_embed, components=get_guide_selects(topic="items"), update=True)
 
 
@@ -68,10 +65,11 @@ def iteminfo(ctx: Context) -> Message:
 def placeinfo(ctx: Context) -> Message:
     """Prints some information about a specific place."""
     player = players.get(ctx.author.id)
-    place = ctx.values[0]
     try:
-        queried_place = places.get(place)
+        queried_place = places.get(int(ctx.values[0]))
     except ValueError:
+        queried_place = None
+    if queried_place is None:
         return Message("Place not found")
     position_embed = Embed(
         title=f"Place info for {queried_place.name}",
@@ -98,10 +96,7 @@ def placeinfo(ctx: Context) -> Message:
             description=t("commands.guide.options.topic.description", locale=config.I18n.FALLBACK),
             description_localizations=get_localizations("commands.guide.options.topic.description"),
             type=CommandOptionType.STRING,
-            choices=[
-                {"name": f[: f.find(".")].replace("_", " "), "value": f[: f.find(".")]}
-                for f in sorted(listdir(config.BASE_PATH + "/guide"))
-            ],
+            choices=[{"name": topic.name.replace("_", " "), "value": topic.name} for topic in content.get_topics()],
         )
     ],
 )
@@ -122,31 +117,30 @@ def guide_topic(ctx: Context):
 
 def get_guide_embed(topic: str) -> Embed:
     """Returns the fitting guide embed for a topic"""
-    with open(config.BASE_PATH + f"/guide/{topic}.md", "r", encoding="utf8") as guide_file:
-        topic = str.lower(topic)
-        guide_embed = Embed(
-            title=f"{str.upper(topic[0])}{topic[1:]}".replace("_", " "),
-            description=guide_file.read(),
-            color=config.EMBED_COLOR,
-            author=Author(name="Truck Simulator Guide", icon_url=config.SELF_AVATAR_URL),
-        )
-        guide_embed.image = Media(url=assets.get(f"/guide/{topic}"))
-        return guide_embed
+    page = content.get_topic(str.lower(topic), translations.get_locale())
+    guide_embed = Embed(
+        title=page.title,
+        description=page.text,
+        color=config.EMBED_COLOR,
+        author=Author(name="Truck Simulator Guide", icon_url=config.SELF_AVATAR_URL),
+    )
+    guide_embed.image = Media(url=assets.get(f"/guide/{page.name}"))
+    return guide_embed
 
 
 def get_guide_selects(topic: str = ""):
     """Builder for the topic select"""
+    return templates.render("guide", _build_guide_selects, "", topic)
+
+
+def _build_guide_selects(owner: str, topic: str) -> list:
     selects = [
         ActionRow(
             components=[
                 SelectMenu(
                     custom_id="guide_topic",
                     options=[
-                        SelectMenuOption(
-                            label=str.upper(f[:1]) + f[1 : f.find(".")].replace("_", " "),
-                            value=f[: f.find(".")],
-                        )
-                        for f in sorted(listdir(config.BASE_PATH + "/guide"))
+                        SelectMenuOption(label=topic.title, value=topic.name) for topic in content.get_topics()
                     ],
                     placeholder="Select a topic",
                 )
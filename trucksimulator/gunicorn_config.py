@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for a preloaded app::
+
+    gunicorn -c python:trucksimulator.gunicorn_config trucksimulator:app
+
+The app, catalog, translations and cached templates are loaded once in the master process. Right before the workers
+are forked they are frozen, so the workers share these memory pages copy-on-write instead of each loading their own.
+Following the advice of the gc module, the garbage collector is disabled while the app is loaded, so freed objects
+don't leave holes in the shared pages. It is enabled again once the loaded heap is frozen, the master keeps collecting
+what it allocates afterwards and the workers inherit the enabled collector.
+
+The metrics files of earlier runs are deleted on start, the gauges of exited workers when they exit. The master serves
+the metrics of all workers on its own loopback address, see :func:`trucksimulator.resources.metrics.serve`.
+"""
+# pylint: disable=invalid-name,unused-argument
+import gc
+
+from trucksimulator.resources import metrics
+
+preload_app = True
+metrics_server = None
+
+gc.disable()
+
+
+def on_starting(server) -> None:
+    """Runs in the master before the server starts, the app is already loaded with preload_app"""
+    # metrics of earlier runs would be added to the new ones
+    metrics.store.clear()
+
+
+def when_ready(server) -> None:
+    """Runs in the master after the app got loaded, before any worker is forked"""
+    # pylint: disable=import-outside-toplevel
+    from trucksimulator import server as app_server
+
+    app_server.preload()
+    # preload() froze the loaded heap, from here on only new objects are collected
+    gc.enable()
+    global metrics_server  # pylint: disable=global-statement
+    metrics_server = metrics.serve()
+
+
+def post_fork(server, worker) -> None:
+    """Runs in every worker right after forking"""
+    if metrics_server is not None:
+        # only the master serves the metrics
+        metrics_server.socket.close()
+
+
+def child_exit(server, worker) -> None:
+    """Runs in the master after a worker exited"""
+    metrics.store.mark_process_dead(worker.pid)
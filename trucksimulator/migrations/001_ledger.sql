@@ -0,0 +1,15 @@
+--
+-- Every money movement is recorded in the ledger
+--
+
+CREATE TABLE IF NOT EXISTS `ledger` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `player_id` varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `amount` int(11) NOT NULL,
+  `reason` varchar(32) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `counterparty` varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `time` int(11) NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `player_time` (`player_id`,`time`),
+  KEY `counterparty_time` (`counterparty`,`time`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,6 @@
+--
+-- The around-me toplist walks players by level, xp and id
+--
+
+ALTER TABLE `players` ADD INDEX IF NOT EXISTS `level_xp_id` (`level`,`xp`,`id`);
+ALTER TABLE `players` DROP INDEX IF EXISTS `level_xp`;
@@ -0,0 +1,5 @@
+--
+-- The money and miles toplists are read in index order instead of sorting the players
+--
+
+ALTER TABLE `players` ADD INDEX IF NOT EXISTS `money` (`money`), ADD INDEX IF NOT EXISTS `miles` (`miles`);
@@ -3,14 +3,13 @@ Some nice autocomplete handlers that are used everywhere
 """
 
 from flask_discord_interactions.models.option import Choice
-from i18n import set as set_i18n
-from i18n import t
+from trucksimulator.resources.translations import set_locale, t
 from trucksimulator.resources import players
 
 
 def amount_all(ctx, *args):
     """Some enhancements for int options"""
-    set_i18n("locale", ctx.locale)
+    set_locale(ctx.locale)
     player = players.get(ctx.author.id)
     amount = None
     for option in args:
@@ -0,0 +1,223 @@
+"""
+Items, places and trucks are static objects stored in objects.db. They are loaded into one immutable catalog that
+holds an index for every lookup the handlers do. When objects.db changes, a new catalog is loaded and replaces the
+old one as a whole, handlers that already got the old catalog keep using it.
+
+The rows are taken from a compiled snapshot of objects.db if there is an up to date one, see
+:mod:`trucksimulator.resources.snapshot`, otherwise they are read from SQLite.
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import trucksimulator.config as config
+from trucksimulator.resources import snapshot, templates
+from trucksimulator.resources.position import Position
+
+PATH = config.BASE_PATH + "/resources/objects.db"
+
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    """
+    Represents an item that can be loaded
+
+    :ivar str name: The name of the item
+    :ivar str emoji: The item's emoji, shown on the map as place icon
+    :ivar str description: The item's description, to be seen in the iteminfo
+    """
+
+    name: str
+    emoji: int
+    description: str
+
+    def __str__(self) -> str:
+        return f"<:placeholder:{self.emoji}> {self.name}"
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    """
+    :ivar str name: The name of the place
+    :ivar position.Postion position: the Place's position
+    :ivar tuple available_actions: all local available commands
+    :ivar str produced_item: Item this place produces in jobs.
+    :ivar str accepted_item: Item this place rewards
+    :ivar int item_reward: money paid when the accepted_item is unloaded
+    """
+
+    name: str
+    position: Position
+    available_actions: tuple[str, ...]
+    produced_item: Optional[str]
+    accepted_item: Optional[str]
+    item_reward: Optional[int]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class Truck:
+    """
+    :ivar int truck_id: Id of this Truck, in range of 0 ... best Truck
+    :ivar str name: Name of the Truck or the Trucks brand
+    :ivar str description: Description that is shown to the player
+    :ivar int price: Price the player has to pay to use this Truck
+    :ivar int gas_consumptions: Amount of Gas used per mile
+    :ivar int gas_capacity: Amount of gas the player can fill in the Truck
+    """
+
+    truck_id: int
+    name: str
+    description: str
+    price: int
+    gas_consumption: int
+    gas_capacity: int
+    loading_capacity: int
+    emoji: str
+
+    def __str__(self) -> str:
+        return self.emoji + " " + self.name
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    """
+    All static objects and their indexes
+
+    :ivar int version: Modification time of the file the catalog was loaded from, in nanoseconds
+    :ivar tuple items: All items
+    :ivar tuple places: All places
+    :ivar tuple trucks: All trucks
+    :ivar Mapping items_by_name: Items by their name
+    :ivar Mapping places_by_position: Places by their position as int
+    :ivar Mapping places_by_name: Places by their name
+    :ivar Mapping trucks_by_id: Trucks by their id
+    :ivar Mapping producers: Item names mapped to the places producing them
+    :ivar Mapping acceptors: Item names mapped to the places accepting them
+    :ivar Mapping places_by_action: Actions like ``refill`` mapped to the places offering them
+    """
+
+    version: int
+    items: tuple[Item, ...]
+    places: tuple[Place, ...]
+    trucks: tuple[Truck, ...]
+    items_by_name: Mapping[str, Item]
+    places_by_position: Mapping[int, Place]
+    places_by_name: Mapping[str, Place]
+    trucks_by_id: Mapping[int, Truck]
+    producers: Mapping[str, tuple[Place, ...]]
+    acceptors: Mapping[str, tuple[Place, ...]]
+    places_by_action: Mapping[str, tuple[Place, ...]]
+
+
+def _group(places: tuple[Place, ...], keys) -> Mapping[str, tuple[Place, ...]]:
+    groups: dict[str, list[Place]] = {}
+    for place in places:
+        for key in keys(place):
+            if key:
+                groups.setdefault(key, []).append(place)
+    return MappingProxyType({key: tuple(group) for key, group in groups.items()})
+
+
+def build(version: int, items: tuple[Item, ...], places: tuple[Place, ...], trucks: tuple[Truck, ...]) -> Catalog:
+    """
+    Builds the indexes of a catalog
+
+    :param int version: The catalog's version
+    :param tuple items: All items
+    :param tuple places: All places
+    :param tuple trucks: All trucks
+    :return: The catalog
+    """
+    return Catalog(
+        version=version,
+        items=items,
+        places=places,
+        trucks=trucks,
+        items_by_name=MappingProxyType({item.name: item for item in items}),
+        places_by_position=MappingProxyType({int(place.position): place for place in places}),
+        places_by_name=MappingProxyType({place.name: place for place in places}),
+        trucks_by_id=MappingProxyType({truck.truck_id: truck for truck in trucks}),
+        producers=_group(places, lambda place: (place.produced_item,)),
+        acceptors=_group(places, lambda place: (place.accepted_item,)),
+        places_by_action=_group(places, lambda place: place.available_actions),
+    )
+
+
+def load(path: str = PATH) -> Catalog:
+    """
+    Reads all static objects, from the compiled snapshot if it matches the database file
+
+    :param str path: The database file
+    :return: The loaded catalog
+    """
+    version = os.stat(path).st_mtime_ns
+    tables = snapshot.load(path)
+    if tables is None:
+        logging.debug("No up to date snapshot of %s, reading the database", path)
+        tables = snapshot.read_tables(path)
+    items = tuple(Item(*row) for row in tables["items"])
+    places = tuple(
+        Place(name, Position.from_int(position), tuple(commands.split(";")), produced, accepted, reward)
+        for name, position, commands, produced, accepted, reward in tables["places"]
+    )
+    trucks = tuple(Truck(*row) for row in tables["trucks"])
+    return build(version, items, places, trucks)
+
+
+# loaded on first use, tasks like deploying the commands import the handlers but never look anything up
+__catalog__: Optional[Catalog] = None
+__lock__ = threading.Lock()
+__next_check__ = monotonic() + config.Caches.CATALOG_CHECK_INTERVAL
+
+
+def get() -> Catalog:
+    """
+    :return: The current catalog, loaded if this is the first lookup
+    """
+    if __catalog__ is None:
+        with __lock__:
+            if __catalog__ is None:
+                swap(load())
+    return __catalog__
+
+
+def swap(catalog: Catalog) -> None:
+    """
+    Replaces the current catalog and drops everything rendered from the old one
+
+    :param Catalog catalog: The new catalog
+    """
+    global __catalog__  # pylint: disable=global-statement
+    __catalog__ = catalog
+    templates.clear()
+
+
+def refresh() -> Catalog:
+    """
+    Reloads the catalog if objects.db changed. The file is checked at most every
+    config.Caches.CATALOG_CHECK_INTERVAL seconds, so this is cheap enough to be called on every request.
+
+    :return: The current catalog
+    """
+    global __next_check__  # pylint: disable=global-statement
+    if __catalog__ is None or monotonic() < __next_check__:
+        return get()
+    with __lock__:
+        if monotonic() < __next_check__:
+            return __catalog__
+        __next_check__ = monotonic() + config.Caches.CATALOG_CHECK_INTERVAL
+        try:
+            if os.stat(PATH).st_mtime_ns != __catalog__.version:
+                swap(load())
+                logging.info("Reloaded the catalog from %s", PATH)
+        except Exception:  # pylint: disable=broad-except
+            # keep serving the old catalog, the file might be replaced right now
+            logging.exception("Could not reload the catalog")
+    return __catalog__
@@ -1,21 +1,22 @@
-# pylint: disable=attribute-defined-outside-init
 """
 Companies are a group of players that collect money together. Every company's logo will appear on the map as emoji.
 Every time a player completes a job. The companies net worth is increased.
 """
 
-import inspect
 import logging
 from dataclasses import dataclass
-from typing import Any, Optional
+from time import monotonic
+from typing import Optional, Union
 
-from trucksimulator.resources import database
+from trucksimulator import config
+from trucksimulator.resources import database, identity, metrics, unitofwork
 from trucksimulator.resources import position as pos
-from trucksimulator.resources.players import Player
+from trucksimulator.resources.persistence import PersistedModel
+from trucksimulator.resources.players import CompanyHeader, Player, hydrate
 
 
-@dataclass
-class Company:
+@dataclass(slots=True)
+class Company(PersistedModel):
     """
     :ivar int id: Internal company id
     :ivar str name: Name of the company
@@ -34,39 +35,16 @@ class Company:
     logo: str = "🏛️"
     net_worth: int = 3000
 
-    def __post_init__(self) -> None:
+    __table__ = "companies"
+    __converters__ = {"hq_position": int}
+
+    def _convert(self) -> None:
         if isinstance(self.hq_position, int):
             self.hq_position = pos.Position.from_int(self.hq_position)
 
-    def __iter__(self):
-        self._n = 0
-        return self
-
-    def __next__(self):
-        if self._n < len(vars(self)) - 1:
-            attr = list(vars(self).keys())[self._n]
-            self._n += 1
-            if attr == "hq_position":
-                return int(self.__getattribute__(attr))
-            return self.__getattribute__(attr)
-        raise StopIteration
-
-    def __setattr__(self, __name: str, __value: Any) -> None:
-        """
-        Overrides the setattr method to update the database when a value is changed
-
-        :param str __name: Name of the attribute
-        :param Any __value: Value of the attribute
-        """
-        context = inspect.getouterframes(inspect.currentframe())[1][3]
-        if context not in ["__init__", "__post_init__", "__next__", "__iter__"]:
-            if __name == "hq_position":
-                __value_db = int(__value)
-            else:
-                __value_db = __value
-            sql_base = f"UPDATE companies SET {__name}=%s WHERE id=%s"
-            database.execute(sql_base, (__value_db, self.id))
-        super().__setattr__(__name, __value)
+    def _written(self, column: str) -> None:
+        if column in ("name", "logo", "hq_position"):
+            unitofwork.after_commit(invalidate_headquarters)
 
     def __str__(self) -> str:
         return self.name
@@ -77,7 +55,7 @@ class Company:
 
         :param int amount: Amount to be added
         """
-        self.net_worth += amount
+        self.increment(net_worth=amount)
 
     def remove_net_worth(self, amount: int) -> None:
         """
@@ -85,7 +63,7 @@ class Company:
 
         :param int amount: Amount to be removed
         """
-        self.net_worth -= amount
+        self.increment(net_worth=-amount)
 
     def get_members(self) -> list[Player]:
         """
@@ -95,7 +73,7 @@ class Company:
         members = []
         records = database.fetchall("SELECT * FROM players WHERE company=%s", (self.id,))
         for member in records:
-            members.append(Player(**member))
+            members.append(hydrate(member))
         return members
 
 
@@ -114,7 +92,7 @@ def exists(name: str) -> bool:
 
 def get(id: Optional[int]) -> Company:
     """
-    Gets a company from the database
+    Gets a company from the database. Within a request, every company is only queried once.
 
     :param int id: The desired company's id, can be None
     :raises CompanyNotFound: In case a company with this name doesn't exist
@@ -122,8 +100,12 @@ def get(id: Optional[int]) -> Company:
     """
     if not id:
         raise CompanyNotFound()
-    record = database.fetchone("SELECT * FROM companies WHERE id=%s", (id,))
-    company = Company(**record)
+    company = identity.get("companies", id)
+    if company is identity.MISSING:
+        record = database.fetchone("SELECT * FROM companies WHERE id=%s", (id,))
+        if record is None:
+            raise CompanyNotFound()
+        company = _hydrate(record)
     return company
 
 
@@ -131,13 +113,60 @@ def get_all() -> list[Company]:
     """
     :return: A list of all registered companies
     """
-    records = database.fetchall("SELECT * from companies")
-    companies = []
-    for record in records:
-        companies.append(Company(**record))
+    companies = identity.get("companies", "*")
+    if companies is identity.MISSING:
+        records = database.fetchall("SELECT * from companies")
+        companies = identity.put("companies", "*", [_hydrate(record) for record in records])
     return companies
 
 
+def _hydrate(record: dict) -> Company:
+    """Turns a record into a Company, reusing the request's existing object"""
+    company = identity.get("companies", record["id"])
+    if company is identity.MISSING:
+        company = identity.put("companies", record["id"], Company.from_row(record))
+    return company
+
+
+def get_headquarters() -> dict[int, CompanyHeader]:
+    """
+    Returns all company headquarters from an in-process cache. The cache is reloaded after
+    config.Caches.HEADQUARTERS_TTL seconds and whenever a company changes through this module.
+
+    :return: The companies' headers, keyed by their hq position as int
+    """
+    global __headquarters__, __headquarters_loaded__  # pylint: disable=global-statement
+    fresh = __headquarters__ is not None and monotonic() - __headquarters_loaded__ <= config.Caches.HEADQUARTERS_TTL
+    metrics.lookup("headquarters", fresh)
+    if not fresh:
+        records = database.fetchall("SELECT id, name, logo, hq_position FROM companies")
+        __headquarters__ = {
+            record["hq_position"]: CompanyHeader(record["id"], record["name"], record["logo"]) for record in records
+        }
+        __headquarters_loaded__ = monotonic()
+    return __headquarters__
+
+
+def get_headquarter(position: Union[int, pos.Position]) -> Optional[CompanyHeader]:
+    """
+    Looks up the company that has its headquarters on a position
+
+    :param int/position.Position position: The position to look at
+    :return: The company's header, None if there is no headquarter
+    """
+    return get_headquarters().get(int(position))
+
+
+def invalidate_headquarters() -> None:
+    """Drops the cached headquarters, they are reloaded on the next lookup"""
+    global __headquarters__  # pylint: disable=global-statement
+    __headquarters__ = None
+
+
+__headquarters__: Optional[dict[int, CompanyHeader]] = None
+__headquarters_loaded__ = 0.0
+
+
 def insert(company: Company) -> int:
     """
     Add a new company
@@ -145,14 +174,19 @@ def insert(company: Company) -> int:
     :param Company company: The company to insert
     :return: The company's id
     """
-    attrs = vars(company)
+    attrs = dict(zip(company.__columns__, company))
     attrs.pop("id")
     placeholders = ", ".join(["%s"] * len(attrs))
     columns = ", ".join(attrs.keys())
     sql = f"INSERT INTO companies ({columns}) VALUES ({placeholders})"
-    database.execute(sql, tuple(company))
+    database.execute(sql, tuple(attrs.values()))
     logging.info("%s created the company %s", company.founder, company.name)
-    return database.fetchone("Select id from companies where name=%s", (company.name,))["id"]
+    company.id = database.fetchone("Select id from companies where name=%s", (company.name,))["id"]
+    company.attach()
+    identity.put("companies", company.id, company)
+    identity.remove("companies", "*")
+    unitofwork.after_commit(invalidate_headquarters)
+    return company.id
 
 
 def remove(company: Company) -> None:
@@ -162,6 +196,10 @@ def remove(company: Company) -> None:
     :param Company company: The company to remove
     """
     database.execute("DELETE FROM companies WHERE id=%s", (company.id,))
+    company.detach()
+    identity.remove("companies", company.id)
+    identity.remove("companies", "*")
+    unitofwork.after_commit(invalidate_headquarters)
     logging.info("Company %s got deleted", company.name)
 
 
@@ -7,8 +7,8 @@ from flask_discord_interactions.models.component import (
     SelectMenu,
     SelectMenuOption,
 )
-from i18n import t
-from trucksimulator.resources import companies, items, places, symbols, trucks
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import items, places, symbols, templates, trucks
 from trucksimulator.resources.companies import Company
 from trucksimulator.resources.players import Player
 
@@ -42,8 +42,9 @@ def get_drive_buttons(player: Player) -> list:
     directional_buttons = []
     place = places.get(player.position)
     current_job = player.get_job()
+    allowed_symbols = symbols.get_drive_position_symbols(player.position)
     for symbol in symbols.get_all_drive_symbols():
-        if symbol in symbols.get_drive_position_symbols(player.position):
+        if symbol in allowed_symbols:
             directional_buttons.append(
                 Button(
                     style=1
@@ -150,32 +151,39 @@ def get_home_buttons(player: Player) -> list:
     :param player: The player to get the buttons for
     :return: A list of buttons
     """
+    company = player.get_company_header()
+    return templates.render(
+        "home", _build_home_buttons, player.id, player.truck_id, company.logo if company is not None else None
+    )
+
+
+def _build_home_buttons(player_id: str, truck_id: int, company_logo) -> list:
     return [
         ActionRow(
             components=[
                 Button(
-                    custom_id=["manage_truck", player.id],
+                    custom_id=["manage_truck", player_id],
                     style=2,
                     label=t("home.truck"),
-                    emoji=symbols.parse_emoji(trucks.get(player.truck_id).emoji),
+                    emoji=symbols.parse_emoji(trucks.get(truck_id).emoji),
                 ),
                 Button(
-                    custom_id=["manage_company", player.id],
+                    custom_id=["manage_company", player_id],
                     style=2,
                     label=t("home.company"),
-                    emoji=symbols.parse_emoji(companies.get(player.company).logo)
-                    if player.company
-                    else {"name": "🏛️", "id": None},
+                    emoji=(
+                        symbols.parse_emoji(company_logo) if company_logo is not None else {"name": "🏛️", "id": None}
+                    ),
                 ),
                 Button(
-                    custom_id=["top", player.id],
+                    custom_id=["top", player_id],
                     style=2,
                     label=t("home.leaderboard"),
                     emoji={"name": "🏆", "id": None},
                 ),
             ]
         ),
-        ActionRow(components=[back_to_road(player.id)]),
+        ActionRow(components=[back_to_road(player_id)]),
     ]
 
 
@@ -233,17 +241,21 @@ def get_truck_components(player: Player) -> list:
     :param player: The player to get the buttons for
     :return: A list of buttons
     """
+    return templates.render("truck", _build_truck_components, player.id)
+
+
+def _build_truck_components(player_id: str) -> list:
     return [
         ActionRow(
             components=[
                 SelectMenu(
-                    custom_id=["truck_view", player.id],
+                    custom_id=["truck_view", player_id],
                     options=get_truck_options(),
                     placeholder=t("truck.view.placeholder"),
                 )
             ]
         ),
-        ActionRow(components=[back_home(player.id)]),
+        ActionRow(components=[back_home(player_id)]),
     ]
 
 
@@ -268,17 +280,21 @@ def get_casino_buttons(player) -> list:
     :param player: The player to get the buttons for
     :return: A list of buttons
     """
+    return templates.render("casino", _build_casino_buttons, player.id)
+
+
+def _build_casino_buttons(player_id: str) -> list:
     return [
         ActionRow(
             components=[
                 Button(
-                    custom_id=["slots_init", player.id],
+                    custom_id=["slots_init", player_id],
                     style=2,
                     label=t("casino.slots.modal.title"),
                     emoji={"name": "🎰", "id": None},
                 ),
                 Button(
-                    custom_id=["blackjack", player.id],
+                    custom_id=["blackjack", player_id],
                     style=2,
                     label=t("coming_soon"),
                     emoji={"name": "♠️", "id": None},
@@ -286,5 +302,5 @@ def get_casino_buttons(player) -> list:
                 ),
             ]
         ),
-        ActionRow(components=[back_to_road(player.id)]),
+        ActionRow(components=[back_to_road(player_id)]),
     ]
@@ -0,0 +1,151 @@
+"""
+Guide pages and messages are markdown files shipped with the bot. They are loaded once per process into an immutable
+store, handlers only look them up. Every available locale is resolved when loading, locales without their own file
+get the fallback locale's text. The store can be reloaded with the admin /reload command.
+
+Guide pages are stored in ``guide/<topic>.md`` and can be translated in ``guide/<locale>/<topic>.md``,
+messages are stored in ``messages/<locale>/<name>.md``.
+"""
+from os import listdir, path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+import trucksimulator.config as config
+
+
+class Topic(NamedTuple):
+    """
+    A guide page
+
+    :ivar str name: The topic's name, used in commands and custom ids
+    :ivar str title: The title shown to players
+    :ivar str text: The page's markdown
+    """
+
+    name: str
+    title: str
+    text: str
+
+
+class Store(NamedTuple):
+    """
+    All loaded content
+
+    :ivar tuple topics: The guide topics in the fallback locale, sorted by name
+    :ivar Mapping guide: Maps (topic name, locale) to the topic
+    :ivar Mapping messages: Maps (message name, locale) to the message's markdown
+    """
+
+    topics: tuple[Topic, ...]
+    guide: Mapping[tuple[str, str], Topic]
+    messages: Mapping[tuple[str, str], str]
+
+
+def _read(filename: str) -> str:
+    with open(filename, "r", encoding="utf8") as markdown_file:
+        return markdown_file.read()
+
+
+def _localized(directory: str, name: str, locale: str) -> str:
+    """
+    :return: The file of a locale, the fallback locale's file if the locale has none
+    """
+    filename = f"{directory}/{locale}/{name}.md"
+    if path.isfile(filename):
+        return filename
+    return f"{directory}/{config.I18n.FALLBACK}/{name}.md"
+
+
+def load() -> Store:
+    """
+    Reads all guide pages and messages
+
+    :return: A new store
+    """
+    guide_dir = config.BASE_PATH + "/guide"
+    messages_dir = config.BASE_PATH + "/messages"
+    topics = []
+    guide = {}
+    for filename in sorted(f for f in listdir(guide_dir) if f.endswith(".md")):
+        name = filename[: -len(".md")]
+        title = (str.upper(name[:1]) + name[1:]).replace("_", " ")
+        topic = Topic(name, title, _read(f"{guide_dir}/{filename}"))
+        topics.append(topic)
+        for locale in config.I18n.AVAILABLE_LOCALES:
+            translated = f"{guide_dir}/{locale}/{filename}"
+            guide[(name, locale)] = (
+                topic._replace(text=_read(translated)) if path.isfile(translated) else topic
+            )
+    messages = {}
+    for filename in listdir(f"{messages_dir}/{config.I18n.FALLBACK}"):
+        name = filename[: -len(".md")]
+        for locale in config.I18n.AVAILABLE_LOCALES:
+            messages[(name, locale)] = _read(_localized(messages_dir, name, locale))
+    return Store(tuple(topics), MappingProxyType(guide), MappingProxyType(messages))
+
+
+# loaded on first use, tasks like deploying the commands import the handlers but never look anything up
+__store__: Optional[Store] = None
+
+
+def _get_store() -> Store:
+    global __store__  # pylint: disable=global-statement
+    if __store__ is None:
+        __store__ = load()
+    return __store__
+
+
+def reload() -> Store:
+    """
+    Reads all files again and replaces the store, requests that are running keep the old one
+
+    :return: The new store
+    """
+    global __store__  # pylint: disable=global-statement
+    __store__ = load()
+    return __store__
+
+
+def get_topics() -> tuple[Topic, ...]:
+    """
+    :return: All guide topics, sorted by name
+    """
+    return _get_store().topics
+
+
+def get_topic(name: str, locale: str = config.I18n.FALLBACK) -> Topic:
+    """
+    Get a guide page
+
+    :param str name: The topic's name
+    :param str locale: The locale to show the page in
+    :raises TopicNotFound: In case the topic doesn't exist
+    :return: The guide page
+    """
+    guide = _get_store().guide
+    topic = guide.get((name, locale)) or guide.get((name, config.I18n.FALLBACK))
+    if topic is None:
+        raise TopicNotFound()
+    return topic
+
+
+def get_message(name: str, locale: str) -> str:
+    """
+    Get a message
+
+    :param str name: The message's name
+    :param str locale: The locale to show the message in, unknown locales get the fallback locale's message
+    :return: The message's markdown
+    """
+    messages = _get_store().messages
+    message = messages.get((name, locale))
+    if message is None:
+        return messages[(name, config.I18n.FALLBACK)]
+    return message
+
+
+class TopicNotFound(Exception):
+    """Exception raised when requested guide topic is not found"""
+
+    def __str__(self) -> str:
+        return "Requested guide topic not found"
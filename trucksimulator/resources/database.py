@@ -1,23 +1,479 @@
 """
 This module contains the database connection
+
+The database is provided by a :class:`Backend`, selected with config.Database.BACKEND. MySQL is used in production,
+SQLite (see :mod:`trucksimulator.resources.sqlite`) runs the bot without a database server.
+
+Connections are kept in a small per-process pool. Every worker creates its own connections lazily,
+connections inherited from a parent process are never reused.
+Inside a :func:`transaction` block all queries of a thread share one connection.
+
+Queries run inside a :func:`track_queries` block are counted and timed, interactions that use the database more than
+allowed by config.QueryLog are logged with their slowest query.
 """
+import json
+import logging
+from abc import ABC, abstractmethod
+import os
+import queue
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from time import monotonic, perf_counter
+from typing import Iterator, Optional
+
 import trucksimulator.config as config
-import mysql.connector
 
 
-def execute(query: str, args=None) -> int:
+class Backend(ABC):
+    """
+    A database the bot can store its data in. Backends hand out connections through a pool with the interface of
+    :class:`ConnectionPool`. Connections have to support the parts of the mysql.connector API used by this module:
+    ``cursor(dictionary=True)`` as context manager with ``execute``, ``executemany``, the fetch methods,
+    ``rowcount`` and ``description``, as well as ``start_transaction``, ``commit``, ``rollback`` and ``close``.
+    Queries are written for MySQL with ``%s`` placeholders, backends translate them if needed.
+
+    :ivar type error: Base class of all errors raised by the backend's driver
+    :ivar tuple connection_errors: Errors after which a connection isn't used again
+    """
+
+    error: type = Exception
+    connection_errors: tuple = ()
+
+    @abstractmethod
+    def connect(self):
+        """
+        :return: A new connection in autocommit mode
+        """
+
+    @abstractmethod
+    def create_pool(self):
+        """
+        :return: The pool the connections of this process are taken from
+        """
+
+    def is_lost_connection(self, error: Exception) -> bool:
+        """
+        :param Exception error: One of the connection errors
+        :return: Whether the connection was dropped, so the query can be retried on a fresh one
+        """
+        return False
+
+
+class MySQLBackend(Backend):
+    """The MySQL server configured with config.DATABASE_ARGS"""
+
+    # server has gone away, lost connection during query, ssl connection error
+    LOST_CONNECTION_ERRNOS = (2006, 2013, 2055)
+
+    def __init__(self) -> None:
+        # imported here, the SQLite backend doesn't need the MySQL driver
+        import mysql.connector  # pylint: disable=import-outside-toplevel
+
+        self._connector = mysql.connector
+        self.error = mysql.connector.errors.Error
+        # errors that indicate a connection that was dropped by the server
+        self.connection_errors = (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)
+
+    def connect(self):
+        return self._connector.connect(autocommit=True, **config.DATABASE_ARGS)
+
+    def create_pool(self) -> "ConnectionPool":
+        return ConnectionPool(
+            self,
+            size=config.DatabasePool.SIZE,
+            timeout=config.DatabasePool.TIMEOUT,
+            ping_interval=config.DatabasePool.PING_INTERVAL,
+        )
+
+    def is_lost_connection(self, error: Exception) -> bool:
+        return getattr(error, "errno", None) in self.LOST_CONNECTION_ERRNOS
+
+
+class ConnectionPool:
+    """
+    A fixed-size pool of database connections, bound to the process that created it
+
+    :ivar Backend backend: The backend connections are created with
+    :ivar int size: Maximum number of connections this pool hands out at once
+    :ivar float timeout: Seconds to wait for a free connection before giving up
+    :ivar float ping_interval: Connections idle for longer than this are pinged before being handed out
+    """
+
+    def __init__(self, backend: Backend, size: int, timeout: float, ping_interval: float) -> None:
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._lock = threading.Lock()
+        # connections created by a parent process. They are kept referenced so the garbage collector never shuts
+        # down a socket the parent is still using
+        self._inherited: list = []
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets all connections, used after forking"""
+        if hasattr(self, "_idle"):
+            while not self._idle.empty():
+                self._inherited.append(self._idle.get_nowait()[0])
+        self._pid = os.getpid()
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.connects = 0
+        self.reconnects = 0
+
+    def _connect(self):
+        return self.backend.connect()
+
+    def acquire(self):
+        """
+        Checks out a connection, waits if all connections are in use
+
+        :raises PoolExhausted: In case no connection got free within the timeout
+        :return: A healthy connection
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._slots.acquire(blocking=False):
+            start = monotonic()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self.waits += 1
+                self.wait_time += monotonic() - start
+            if not acquired:
+                raise PoolExhausted(self.size)
+        with self._lock:
+            self.checkouts += 1
+        try:
+            try:
+                con, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self.connects += 1
+                return self._connect()
+            if monotonic() - last_used > self.ping_interval and not con.is_connected():
+                logging.info("Reconnecting a stale database connection")
+                with self._lock:
+                    self.reconnects += 1
+                con.reconnect(attempts=2, delay=0)
+            return con
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, con, discard: bool = False) -> None:
+        """
+        Returns a connection to the pool
+
+        :param con: The connection to return
+        :param bool discard: Close the connection instead of reusing it
+        """
+        if self._pid != os.getpid():
+            # checked out before a fork, the slot belongs to the old pool
+            self._inherited.append(con)
+            return
+        if discard:
+            try:
+                con.close()
+            except self.backend.error:
+                pass
+        else:
+            self._idle.put((con, monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that checks out a connection and returns it afterwards.
+        Connections that raised a connection error are discarded.
+        """
+        con = self.acquire()
+        try:
+            yield con
+        except self.backend.connection_errors:
+            self.release(con, discard=True)
+            raise
+        except BaseException:
+            self.release(con)
+            raise
+        self.release(con)
+
+    def stats(self) -> dict:
+        """
+        :return: Counters that help sizing the pool
+        """
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "wait_time": round(self.wait_time, 6),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+        }
+
+
+def get_backend(name: str) -> Backend:
+    """
+    :param str name: ``mysql`` or ``sqlite``
+    :return: The backend with that name
+    :raises ValueError: In case there is no such backend
+    """
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "sqlite":
+        # pylint: disable=import-outside-toplevel
+        from trucksimulator.resources import sqlite
+
+        return sqlite.SQLiteBackend(config.Database.SQLITE_PATH, config.Database.SQLITE_TIMEOUT)
+    raise ValueError(f"Unknown database backend {name!r}")
+
+
+MIGRATIONS = config.BASE_PATH + "/migrations"
+
+backend = get_backend(config.Database.BACKEND)
+pool = backend.create_pool()
+
+
+_local = threading.local()
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b|%s")
+_LISTS = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=256)
+def normalize(query: str) -> str:
+    """
+    Strips the parameters from a query, so queries only differing in their values look the same
+
+    :param str query: The query
+    :return: The query with every value replaced by ``?``
+    """
+    query = _LITERALS.sub("?", query)
+    query = _LISTS.sub("(...)", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class QueryStats:
+    """
+    The queries run while handling one interaction
+
+    :ivar str handler: Name of the command or handler
+    :ivar int count: Number of queries
+    :ivar float time: Seconds spent running queries
+    :ivar str slowest: The slowest query, normalized
+    :ivar float slowest_time: Seconds the slowest query took
+    :ivar dict queries: Every normalized query mapped to how often it ran and the seconds it took in total
+    """
+
+    def __init__(self, handler: str) -> None:
+        self.handler = handler
+        self.count = 0
+        self.time = 0.0
+        self.slowest: Optional[str] = None
+        self.slowest_time = 0.0
+        self.queries: dict[str, list] = {}
+
+    def add(self, query: str, duration: float) -> None:
+        """
+        Records a query
+
+        :param str query: The query as sent, with placeholders
+        :param float duration: Seconds the query took
+        """
+        query = normalize(query)
+        self.count += 1
+        self.time += duration
+        if duration >= self.slowest_time:
+            self.slowest, self.slowest_time = query, duration
+        entry = self.queries.setdefault(query, [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    def exceeded(self) -> bool:
+        """
+        :return: Whether the interaction used the database more than config.QueryLog allows
+        """
+        return self.count > config.QueryLog.MAX_QUERIES or self.time > config.QueryLog.MAX_TIME
+
+    def as_dict(self, breakdown: bool = False) -> dict:
+        """
+        :param bool breakdown: Include every query
+        :return: The stats, times in milliseconds
+        """
+        stats = {
+            "handler": self.handler,
+            "queries": self.count,
+            "time_ms": round(self.time * 1000, 3),
+            "slowest": self.slowest,
+            "slowest_ms": round(self.slowest_time * 1000, 3),
+        }
+        if breakdown:
+            stats["breakdown"] = [
+                {"query": query, "count": count, "time_ms": round(time * 1000, 3)}
+                for query, (count, time) in sorted(self.queries.items(), key=lambda item: item[1][1], reverse=True)
+            ]
+        return stats
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries(stats: QueryStats) -> Iterator[QueryStats]:
+    """
+    Records all queries run in the block, also on threads that run a copy of the current context.
+    When the block is left, the stats are logged if they exceed the configured thresholds.
+
+    :param QueryStats stats: The stats to record to
+    """
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+        if stats.exceeded():
+            logging.warning("Heavy database usage: %s", json.dumps(stats.as_dict()))
+
+
+@contextmanager
+def transaction():
+    """
+    Binds one connection to the current thread for the duration of the block.
+    The database transaction is started lazily with the first write, committed when the block is left and rolled
+    back if it raises. Nested blocks join the outer one.
+    """
+    if getattr(_local, "connection", None) is not None:
+        yield
+        return
+    with pool.connection() as con:
+        _local.connection = con
+        _local.begun = False
+        try:
+            yield
+            if _local.begun:
+                con.commit()
+        except BaseException:
+            if _local.begun:
+                con.rollback()
+            raise
+        finally:
+            _local.connection = None
+            _local.begun = False
+
+
+def in_transaction() -> bool:
+    """
+    :return: Whether the current thread has started writing in a transaction block
+    """
+    return getattr(_local, "begun", False)
+
+
+def _run(operation, query: str, args, write: bool = False, many: bool = False, read: bool = False, **cursor_args):
+    """
+    Runs a query, timed if queries are tracked
+    """
+    stats = _query_stats.get()
+    if stats is None:
+        return _run_query(operation, query, args, write, many, read, **cursor_args)
+    start = perf_counter()
+    try:
+        return _run_query(operation, query, args, write, many, read, **cursor_args)
+    finally:
+        stats.add(query, perf_counter() - start)
+
+
+def _run_query(operation, query: str, args, write: bool, many: bool, read: bool, **cursor_args):
+    """
+    Runs a query on the connection bound by :func:`transaction` or on a pooled one.
+    If the server dropped a pooled connection, a read is retried once on a fresh one. Writes are never retried, the
+    connection might have been lost after the server applied them. Neither is anything in a transaction.
+    With many, args is a sequence of argument tuples, the query is run once per tuple.
+    """
+    bound = getattr(_local, "connection", None)
+    if bound is not None:
+        if write and not _local.begun:
+            bound.start_transaction()
+            _local.begun = True
+        with bound.cursor(dictionary=True, **cursor_args) as cur:
+            (cur.executemany if many else cur.execute)(query, args)
+            return operation(cur)
+
+    def run_once():
+        with pool.connection() as con:
+            with con.cursor(dictionary=True, **cursor_args) as cur:
+                (cur.executemany if many else cur.execute)(query, args)
+                return operation(cur)
+
+    try:
+        return run_once()
+    except backend.connection_errors as error:
+        if not read or not backend.is_lost_connection(error):
+            raise
+        logging.warning("Lost the database connection (%s), retrying", error)
+        return run_once()
+
+
+def execute(query: str, args=None, standalone: bool = False) -> int:
     """
     Executes a query
 
     :param str query: The query to execute
     :param args: The arguments to pass to the query
+    :param bool standalone: The query is atomic on its own and doesn't need to start a transaction
+    :returns: the number of rows affected
+    """
+    return _run(lambda cur: cur.rowcount, query, args, write=not standalone)
+
+
+def executemany(query: str, seq_args, standalone: bool = False) -> int:
+    """
+    Executes a query for every set of arguments. INSERTs are sent as a single multi-row statement.
+
+    :param str query: The query to execute
+    :param seq_args: A sequence of argument tuples
+    :param bool standalone: The query is atomic on its own and doesn't need to start a transaction
     :returns: the number of rows affected
     """
-    with mysql.connector.connect(**config.DATABASE_ARGS) as con:
-        with con.cursor(dictionary=True) as cur:
-            cur.execute(query, args)
-            con.commit()
-            return cur.rowcount
+    return _run(lambda cur: cur.rowcount, query, seq_args, write=not standalone, many=True)
+
+
+def run_statement(query: str) -> tuple[int, Optional[list[dict]]]:
+    """
+    Runs any statement without arguments, used by the admins' /sql command
+
+    :param str query: The statement
+    :returns: The number of affected rows and the result rows, None if the statement doesn't return rows
+    """
+    return _run(lambda cur: (cur.rowcount, cur.fetchall() if cur.description else None), query, None)
+
+
+def migrate(directory: str = MIGRATIONS) -> list[str]:
+    """
+    Brings an existing MySQL database up to date with database.sql. Every migration is idempotent, so all of them are
+    run on every start. SQLite databases are created from database.sql and don't need them.
+
+    :param str directory: Directory of the migrations, they are run in the order of their file names
+    :return: The names of the migrations that were run
+    """
+    if not isinstance(backend, MySQLBackend):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".sql"))
+    for name in names:
+        with open(f"{directory}/{name}", encoding="utf-8") as migration:
+            statements = re.split(r";\s*$", migration.read(), flags=re.MULTILINE)
+        for statement in statements:
+            if any(line.strip() and not line.lstrip().startswith("--") for line in statement.splitlines()):
+                run_statement(statement)
+        logging.info("Ran migration %s", name)
+    return names
 
 
 def fetchall(query: str, args=None) -> list[dict]:
@@ -28,10 +484,7 @@ def fetchall(query: str, args=None) -> list[dict]:
     :param args: The arguments to pass to the query
     :returns: A list of records as dictionaries
     """
-    with mysql.connector.connect(**config.DATABASE_ARGS) as con:
-        with con.cursor(dictionary=True) as cur:
-            cur.execute(query, args)
-            return cur.fetchall()
+    return _run(lambda cur: cur.fetchall(), query, args, read=True)
 
 
 def fetchmany(query: str, args=None, size=None) -> list[dict]:
@@ -43,10 +496,7 @@ def fetchmany(query: str, args=None, size=None) -> list[dict]:
     :param size: The number of results to fetch
     :returns: A list of records as dictionaries
     """
-    with mysql.connector.connect(**config.DATABASE_ARGS) as con:
-        with con.cursor(dictionary=True, buffered=True) as cur:
-            cur.execute(query, args)
-            return cur.fetchmany(size)
+    return _run(lambda cur: cur.fetchmany(size), query, args, read=True, buffered=True)
 
 
 def fetchone(query: str, args=None) -> dict:
@@ -57,7 +507,19 @@ def fetchone(query: str, args=None) -> dict:
     :param args: The arguments to pass to the query
     :returns: A single record as a dictionary
     """
-    with mysql.connector.connect(**config.DATABASE_ARGS) as con:
-        with con.cursor(dictionary=True, buffered=True) as cur:
-            cur.execute(query, args)
-            return cur.fetchone()
+    return _run(lambda cur: cur.fetchone(), query, args, read=True, buffered=True)
+
+
+class PoolExhausted(Exception):
+    """
+    Exception raised when no database connection got free in time
+
+    :ivar int size: Size of the exhausted pool
+    """
+
+    def __init__(self, size: int, *args: object) -> None:
+        self.size = size
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        return f"All {self.size} database connections are in use"
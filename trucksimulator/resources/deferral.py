@@ -0,0 +1,206 @@
+"""
+Discord drops interactions that aren't answered within 3 seconds. The watchdog runs every handler on a worker thread
+and waits for it up to a threshold. Handlers that finish in time are answered directly, slower ones get a deferred
+response right away and their result is delivered through the follow-up endpoints once they are done.
+
+Handlers run in an app context of their own with a copy of the request context, so their ``g`` and identity map are
+torn down when they are done and not when the request is answered. Handlers that might show a modal can't be
+deferred, they are marked with :func:`immediate`.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from time import monotonic
+from typing import Any, Callable
+
+from flask import current_app
+from flask.globals import request_ctx
+from flask_discord_interactions import Message
+from flask_discord_interactions.context import Context
+from flask_discord_interactions.models.modal import Modal
+
+import trucksimulator.config as config
+from trucksimulator.resources import followups
+
+
+IMMEDIATE = "__answer_immediately__"
+
+
+def immediate(handler: Callable) -> Callable:
+    """
+    Marks a handler that is never deferred, e.g. because it shows a modal which can't be sent as a follow-up.
+    Use it below the handler's registration decorator.
+
+    :param Callable handler: The handler function
+    :return: The handler
+    """
+    setattr(handler, IMMEDIATE, True)
+    return handler
+
+
+class _Run:
+    """The state of one handler run, shared by the request thread and the worker"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.deferred = False
+        self.result: Any = None
+        self.error: Exception = None
+
+
+class Watchdog:
+    """
+    Runs handlers on a fixed number of threads and defers the ones that miss the threshold
+
+    :ivar float threshold: Seconds to wait for a handler before deferring, 0 runs every handler directly
+    :ivar int workers: Number of handler threads
+    :ivar int queue_size: Number of handlers waiting for a thread, further ones run directly on the request thread
+    """
+
+    def __init__(self, threshold: float, workers: int, queue_size: int) -> None:
+        self.threshold = threshold
+        self.workers = workers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets the handler threads, used after forking"""
+        self._pid = os.getpid()
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self.answered = 0
+        self.deferred = 0
+        self.delivered = 0
+        self.failed = 0
+        self.errors = 0
+        self.overflowed = 0
+        self.run_time = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="handler")
+            return self._executor
+
+    def run(self, ctx: Context, handler: Callable[[], Any], component: bool, deferrable: bool = True) -> Any:
+        """
+        Runs a handler within the time budget
+
+        :param Context ctx: The interaction's context, used to deliver a deferred result
+        :param Callable handler: Runs the interaction and returns its response
+        :param bool component: Whether the interaction came from a component, deferred responses then keep the
+            message instead of showing a loading state
+        :param bool deferrable: Whether the handler may be deferred, see :func:`immediate`
+        :return: The handler's response or a deferred response
+        """
+        if self.threshold <= 0 or not deferrable:
+            return handler()
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            # every thread is busy and the queue is full, waiting in it would only get the handler deferred
+            with self._lock:
+                self.overflowed += 1
+            return handler()
+        state = _Run()
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+        request_context = request_ctx.copy()
+
+        def work():
+            start = monotonic()
+            try:
+                # a fresh app context gives the handler its own g, the request's one is torn down when it is answered
+                with app.app_context(), request_context:
+                    result, error = self._call(handler)
+                    with state.lock:
+                        state.result, state.error = result, error
+                        state.done.set()
+                        deferred = state.deferred
+                    if deferred:
+                        if error is not None:
+                            with self._lock:
+                                self.errors += 1
+                            # answered by the app's error handlers, just like a direct response
+                            result = current_app.handle_user_exception(error)
+                        self._deliver(ctx, result, component)
+            finally:
+                slots.release()
+                with self._lock:
+                    self.run_time += monotonic() - start
+
+        # the handler sees the request's context variables, like its locale
+        executor.submit(copy_context().run, work)
+        state.done.wait(self.threshold)
+        with state.lock:
+            if not state.done.is_set():
+                state.deferred = True
+        if state.deferred:
+            with self._lock:
+                self.deferred += 1
+            logging.info("Deferred the response to %s", ctx.primary_id or ctx.command_name)
+            return Message(deferred=True, update=component)
+        with self._lock:
+            self.answered += 1
+        if state.error is not None:
+            raise state.error
+        return state.result
+
+    @staticmethod
+    def _call(handler: Callable[[], Any]) -> tuple[Any, Exception]:
+        try:
+            return handler(), None
+        except Exception as exc:  # pylint: disable=broad-except
+            return None, exc
+
+    def _deliver(self, ctx: Context, result: Any, component: bool) -> None:
+        if isinstance(result, Modal):
+            logging.warning("Can't show a modal after deferring %s", ctx.primary_id or ctx.command_name)
+            queued = False
+        elif component and not (isinstance(result, Message) and result.update):
+            queued = followups.send(ctx, result)
+        else:
+            queued = followups.edit(ctx, result)
+        with self._lock:
+            if queued:
+                self.delivered += 1
+            else:
+                self.failed += 1
+
+    def drain(self) -> None:
+        """Waits for the handlers that are still running, a new thread pool is started when the next one comes in"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """
+        :return: Counters of directly answered and deferred interactions, of deferred handlers that raised an error
+            and of handlers that found the queue full
+        """
+        return {
+            "threshold": self.threshold,
+            "answered": self.answered,
+            "deferred": self.deferred,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "errors": self.errors,
+            "overflowed": self.overflowed,
+            "run_time": round(self.run_time, 6),
+        }
+
+
+# every running handler holds a database connection for its unit of work, more threads than connections would only
+# wait for the pool
+watchdog = Watchdog(
+    threshold=config.Deferral.THRESHOLD,
+    workers=min(config.Deferral.WORKERS, config.DatabasePool.SIZE),
+    queue_size=config.Deferral.QUEUE_SIZE,
+)
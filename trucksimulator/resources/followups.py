@@ -0,0 +1,227 @@
+"""
+Follow-up messages are sent after the interaction got answered. Instead of a thread per interaction, every worker
+process runs a few sender threads that take jobs from a bounded queue and share one keep-alive HTTP session.
+Rate limited requests are retried with exponential backoff, and so are server errors of requests that can safely be
+sent twice. A POST that got a server error might have created its message anyway, it is not retried.
+
+Follow-ups are sent to config.Discord.BASE_URL, which can point to a local stub of the webhook endpoints.
+
+Messages are rendered in the request thread, the sender threads only do the HTTP requests.
+"""
+import logging
+import os
+import queue
+import threading
+from time import monotonic, sleep
+from typing import Callable, Union
+
+import requests
+from flask_discord_interactions import Message
+from flask_discord_interactions.context import Context
+
+import trucksimulator.config as config
+
+# requests that have the same effect when they are sent twice
+IDEMPOTENT = ("GET", "PATCH", "PUT", "DELETE")
+
+
+class FollowupExecutor:
+    """
+    A fixed number of sender threads working through a bounded queue, bound to the process that created it
+
+    :ivar int workers: Number of sender threads
+    :ivar int queue_size: Maximum number of waiting jobs, further jobs are rejected
+    :ivar int retries: How often a rate limited or failed idempotent request is retried
+    :ivar float backoff: Seconds to wait before the first retry, doubled for every further one
+    :ivar float timeout: Seconds to wait for Discord to answer a request
+    """
+
+    def __init__(self, workers: int, queue_size: int, retries: int, backoff: float, timeout: float) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets all jobs and threads, used after forking"""
+        self._pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(self.queue_size)
+        self._threads: list[threading.Thread] = []
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"followup-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job, args, submitted = self._queue.get()
+            started = monotonic()
+            try:
+                job(*args)
+                failed = False
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Follow-up job %s failed", getattr(job, "__name__", job))
+                failed = True
+            with self._lock:
+                self.wait_time += started - submitted
+                self.run_time += monotonic() - started
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            self._queue.task_done()
+
+    def submit(self, job: Callable, *args) -> bool:
+        """
+        Queues a job for the sender threads
+
+        :param Callable job: The function to run
+        :param args: Arguments passed to the function
+        :return: Whether the job got queued, False if the queue is full
+        """
+        if self._pid != os.getpid() or len(self._threads) < self.workers:
+            self._start()
+        try:
+            self._queue.put_nowait((job, args, monotonic()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            logging.warning("Follow-up queue is full, dropped %s", getattr(job, "__name__", job))
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request with the shared session. Rate limited requests are retried, server errors only if the method
+        is idempotent.
+
+        :param str method: The HTTP method
+        :param str url: The requested url
+        :param kwargs: Passed to :meth:`requests.Session.request`
+        :raises requests.HTTPError: If the request still fails after all retries
+        :return: The successful response
+        """
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            response = self._session.request(method, url, timeout=self.timeout, **kwargs)
+            retry = response.status_code == 429 or (response.status_code >= 500 and method.upper() in IDEMPOTENT)
+            if not retry or attempt == self.retries:
+                break
+            wait = delay
+            if response.status_code == 429:
+                # Discord tells how long to wait, in seconds
+                wait = max(delay, float(response.headers.get("Retry-After", 0)))
+            logging.info("Follow-up request got %s, retrying in %ss", response.status_code, wait)
+            with self._lock:
+                self.retried += 1
+            sleep(wait)
+            delay *= 2
+        response.raise_for_status()
+        return response
+
+    def stats(self) -> dict:
+        """
+        :return: Counters that help sizing the executor
+        """
+        return {
+            "workers": len(self._threads),
+            "queued": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "wait_time": round(self.wait_time, 6),
+            "run_time": round(self.run_time, 6),
+        }
+
+
+executor = FollowupExecutor(
+    workers=config.Followups.WORKERS,
+    queue_size=config.Followups.QUEUE_SIZE,
+    retries=config.Followups.RETRIES,
+    backoff=config.Followups.BACKOFF,
+    timeout=config.Followups.TIMEOUT,
+)
+
+
+def _disabled(ctx: Context) -> bool:
+    return not ctx.app or ctx.app.config["DONT_REGISTER_WITH_DISCORD"]
+
+
+def _deliver(method: str, url: str, kwargs: dict) -> None:
+    executor.request(method, url, **kwargs)
+
+
+def payload(message: Union[Message, str, dict]) -> dict:
+    """
+    Encodes a message for a follow-up request
+
+    :param message: The message to encode, or a raw interaction response as returned by the error handlers
+    :return: Keyword arguments for :meth:`FollowupExecutor.request`
+    """
+    if isinstance(message, dict):
+        return {"json": message["data"]}
+    data, mimetype = Message.from_return_value(message).encode(followup=True)
+    return {"data": data, "headers": {"Content-Type": mimetype}}
+
+
+def send(ctx: Context, message: Union[Message, str, dict]) -> bool:
+    """
+    Sends a new follow-up message in the background
+
+    :param Context ctx: The interaction's context
+    :param message: The message to send, rendered right away
+    :return: Whether the message got queued
+    """
+    if _disabled(ctx):
+        return True
+    return executor.submit(_deliver, "POST", ctx.followup_url(), payload(message))
+
+
+def edit(ctx: Context, message: Union[Message, str, dict], message_id: str = "@original") -> bool:
+    """
+    Edits a message in the background
+
+    :param Context ctx: The interaction's context
+    :param message: The updated message, rendered right away
+    :param str message_id: The message to edit, the original response by default
+    :return: Whether the edit got queued
+    """
+    if _disabled(ctx):
+        return True
+    return executor.submit(_deliver, "PATCH", ctx.followup_url(message_id), payload(message))
+
+
+def submit(job: Callable, *args) -> bool:
+    """
+    Runs any follow-up work in the background, use :meth:`FollowupExecutor.request` for requests
+
+    :param Callable job: The function to run
+    :param args: Arguments passed to the function
+    :return: Whether the job got queued
+    """
+    return executor.submit(job, *args)
@@ -0,0 +1,62 @@
+"""
+A request-scoped identity map. While a request is handled, every database row is represented by a single object, so
+repeated lookups return the same object and changes made through it are seen everywhere.
+The map lives on flask's ``g`` and is cleared when the request is torn down. Outside a request nothing is cached.
+"""
+from typing import Any, Hashable
+
+from flask import g, has_request_context
+
+# returned if a row is not in the map
+MISSING = object()
+
+
+def _get_map() -> dict:
+    identity_map = g.get("identity_map")
+    if identity_map is None:
+        identity_map = g.identity_map = {}
+    return identity_map
+
+
+def get(table: str, key: Hashable) -> Any:
+    """
+    Looks up an object
+
+    :param str table: The object's table
+    :param key: The object's primary key
+    :return: The cached object or MISSING
+    """
+    if not has_request_context():
+        return MISSING
+    return _get_map().get((table, key), MISSING)
+
+
+def put(table: str, key: Hashable, obj: Any) -> Any:
+    """
+    Caches an object for the rest of the request
+
+    :param str table: The object's table
+    :param key: The object's primary key
+    :param obj: The object to cache
+    :return: The cached object
+    """
+    if has_request_context():
+        _get_map()[(table, key)] = obj
+    return obj
+
+
+def remove(table: str, key: Hashable) -> None:
+    """
+    Drops an object from the map, used when its row gets deleted
+
+    :param str table: The object's table
+    :param key: The object's primary key
+    """
+    if has_request_context():
+        _get_map().pop((table, key), None)
+
+
+def clear(*args) -> None:
+    """Forgets all objects, registered as request teardown"""
+    if has_request_context():
+        g.pop("identity_map", None)
@@ -1,33 +1,9 @@
 """
 Items can be loaded and unloaded from the truck at all places. They mostly consist of a name and an emoji
 """
-import sqlite3
-from dataclasses import dataclass
+from trucksimulator.resources import catalog
 
-from trucksimulator import config
-
-
-@dataclass
-class Item:
-    """
-    Represents an item that can be loaded
-
-    :ivar str name: The name of the item
-    :ivar str emoji: The item's emoji, shown on the map as place icon
-    :ivar str description: The item's description, to be seen in the iteminfo
-    """
-
-    name: str
-    emoji: int
-    description: str
-
-    def __str__(self) -> str:
-        return f"<:placeholder:{self.emoji}> {self.name}"
-
-
-def __generate_list(lst) -> None:
-    for i in __cur__.fetchall():
-        lst.append(Item(*i))
+Item = catalog.Item
 
 
 def get(name) -> Item:
@@ -38,27 +14,17 @@ def get(name) -> Item:
     :raises ItemNotFound: In case the item doesn't exist
     :return: The corresponding item
     """
-    for item in __all_items__:
-        if item.name == name:
-            return item
-    raise ItemNotFound()
+    item = catalog.get().items_by_name.get(name)
+    if item is None:
+        raise ItemNotFound()
+    return item
 
 
-def get_all() -> list:
+def get_all() -> tuple[Item, ...]:
     """
-    :return: A list of all available items
+    :return: All available items
     """
-    return __all_items__
-
-
-__con__ = sqlite3.connect(config.BASE_PATH + "/resources/objects.db")
-__cur__ = __con__.cursor()
-
-__cur__.execute("SELECT * FROM items")
-__all_items__ = []
-__generate_list(__all_items__)
-
-__con__.close()
+    return catalog.get().items
 
 
 class ItemNotFound(Exception):
@@ -1,4 +1,3 @@
-# pylint: disable=attribute-defined-outside-init
 """
 Jobs are the main way to get money. For every job, the player has to bring items from one place to another.
 After the job is done, the reward is payed out.
@@ -8,8 +7,9 @@ from math import sqrt
 from random import randint
 from time import time
 
-from i18n import t
+from trucksimulator.resources.translations import t
 from trucksimulator.resources import places
+from trucksimulator.resources.persistence import PersistedModel
 from trucksimulator.utils import commatize
 
 STATE_CLAIMED = 0
@@ -17,8 +17,12 @@ STATE_LOADED = 1
 STATE_DONE = 2
 
 
-@dataclass
-class Job:
+def _place_to_db(place: places.Place) -> int:
+    return int(place.position)
+
+
+@dataclass(slots=True)
+class Job(PersistedModel):
     """
     :ivar str player_id: Player id that this jobs belongs to used as primary key in the database
     :ivar places.Place place_from: Place from which the player has to take the items
@@ -35,16 +39,16 @@ class Job:
     reward: int
     create_time: int
 
-    def __post_init__(self) -> None:
+    __table__ = "jobs"
+    __key__ = "player_id"
+    __converters__ = {"place_from": _place_to_db, "place_to": _place_to_db}
+
+    def _convert(self) -> None:
         if isinstance(self.place_from, int):
             self.place_from = places.get(self.place_from)
         if isinstance(self.place_to, int):
             self.place_to = places.get(self.place_to)
 
-    def __iter__(self):
-        self._n = 0
-        return self
-
     @property
     def target_place(self) -> places.Place:
         """
@@ -52,15 +56,6 @@ class Job:
         """
         return self.place_from if self.state == 0 else self.place_to
 
-    def __next__(self):
-        if self._n < len(vars(self)) - 1:
-            attr = list(vars(self).keys())[self._n]
-            self._n += 1
-            if attr in ["place_from", "place_to"]:
-                return int(self.__getattribute__(attr).position)
-            return self.__getattribute__(attr)
-        raise StopIteration
-
 
 def generate(player) -> Job:
     """
@@ -70,7 +65,7 @@ def generate(player) -> Job:
     :param players.Player player: Player that this job belongs to
     :return: The full job
     """
-    available_places = places.get_all().copy()
+    available_places = list(places.get_all())
     place_from = available_places[randint(0, len(available_places) - 1)]
     available_places.remove(place_from)
     place_to = available_places[randint(0, len(available_places) - 1)]
@@ -0,0 +1,146 @@
+"""
+The leaderboard keeps the top players per key in memory. It is shared by all requests of a worker and reloaded once it
+is older than config.Caches.LEADERBOARD_MAX_AGE seconds, so opening the toplist doesn't sort the players table.
+"""
+import threading
+from time import time
+from typing import NamedTuple
+
+from trucksimulator import config
+from trucksimulator.resources import database, metrics
+
+# number of players shown per list
+SIZE = 15
+# number of players shown above and below the player in the around view
+AROUND_SIZE = 5
+
+# ORDER BY clause and value suffix for each key
+KEYS = {
+    "level": ("level DESC, xp DESC, id DESC", ""),
+    "money": ("money DESC", "$"),
+    "miles": ("miles DESC", " miles"),
+}
+
+
+class Row(NamedTuple):
+    """
+    The columns of a player that are shown in a toplist
+
+    :ivar str id: The player's id
+    :ivar str name: The player's name
+    :ivar str discriminator: The player's discriminator
+    :ivar int level: The player's level
+    :ivar int xp: Xp for current level
+    :ivar int money: Amount of in-game currency the player has
+    :ivar int miles: Amount of miles the Player has driven
+    """
+
+    id: str
+    name: str
+    discriminator: str
+    level: int
+    xp: int
+    money: int
+    miles: int
+
+    def __str__(self) -> str:
+        return f"**{self.name}**#{self.discriminator}"
+
+
+class Board(NamedTuple):
+    """
+    A loaded toplist
+
+    :ivar tuple rows: The top players
+    :ivar str suffix: A suffix to be shown behind every value
+    :ivar float loaded: Unix timestamp of the load
+    """
+
+    rows: tuple
+    suffix: str
+    loaded: float
+
+    @property
+    def age(self) -> int:
+        """
+        :return: Seconds since this list was loaded
+        """
+        return int(time() - self.loaded)
+
+
+__boards__: dict[str, Board] = {}
+__lock__ = threading.Lock()
+
+
+def _load(key: str) -> Board:
+    order, suffix = KEYS[key]
+    records = database.fetchmany(
+        f"SELECT {', '.join(Row._fields)} FROM players ORDER BY {order} LIMIT %s", (SIZE,), size=SIZE
+    )
+    return Board(tuple(Row(**record) for record in records), suffix, time())
+
+
+def get(key: str) -> Board:
+    """
+    Get a toplist, reloads it if it's too old
+
+    :param str key: Key to sort the players by, one of KEYS. Unknown keys fall back to level
+    :return: The toplist
+    """
+    if key not in KEYS:
+        key = "level"
+    board = __boards__.get(key)
+    fresh = board is not None and board.age < config.Caches.LEADERBOARD_MAX_AGE
+    metrics.lookup("leaderboard", fresh)
+    if not fresh:
+        # only one thread reloads, the others wait and use its result
+        with __lock__:
+            board = __boards__.get(key)
+            if board is None or board.age >= config.Caches.LEADERBOARD_MAX_AGE:
+                board = __boards__[key] = _load(key)
+    return board
+
+
+def around(player, size: int = AROUND_SIZE) -> list[tuple[int, Row]]:
+    """
+    Get the players ranked right above and below a player by level. The players are sorted by level, xp and id, all
+    descending. The neighbours are fetched with keyset queries that compare the row (level, xp, id), they are range
+    scans on the level_xp_id index in one direction, so the cost doesn't grow with the player count.
+
+    :param players.Player player: The player in the center of the list
+    :param int size: Number of players shown above and below
+    :return: Tuples of rank and row, sorted by rank
+    """
+    columns = ", ".join(Row._fields)
+    level, xp, player_id = player.level, player.xp, player.id
+    above = database.fetchmany(
+        f"SELECT {columns} FROM players WHERE (level, xp, id) > (%s, %s, %s) "
+        "ORDER BY level ASC, xp ASC, id ASC LIMIT %s",
+        (level, xp, player_id, size),
+        size=size,
+    )
+    below = database.fetchmany(
+        f"SELECT {columns} FROM players WHERE (level, xp, id) < (%s, %s, %s) "
+        "ORDER BY level DESC, xp DESC, id DESC LIMIT %s",
+        (level, xp, player_id, size),
+        size=size,
+    )
+    center = Row(**{field: getattr(player, field) for field in Row._fields})
+    rows = [Row(**record) for record in reversed(above)] + [center] + [Row(**record) for record in below]
+
+    # players on the same level with the same xp share their rank
+    top = rows[0]
+    counts = database.fetchone(
+        "SELECT COUNT(*) AS ahead, COALESCE(SUM(level = %s AND xp = %s), 0) AS tied FROM players "
+        "WHERE (level, xp, id) > (%s, %s, %s)",
+        (top.level, top.xp, top.level, top.xp, top.id),
+    )
+    position = counts["ahead"] + 1
+    rank = position - int(counts["tied"])
+    ranked = [(rank, top)]
+    for previous, row in zip(rows, rows[1:]):
+        position += 1
+        if (row.level, row.xp) != (previous.level, previous.xp):
+            rank = position
+        ranked.append((rank, row))
+    return ranked
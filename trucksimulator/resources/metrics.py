@@ -0,0 +1,386 @@
+"""
+Prometheus metrics, added up over all worker processes.
+
+Every process writes its values into memory mapped files of its own in config.Metrics.DIRECTORY, one for counters
+and histograms and one for gauges. Recording a value only writes to memory. Rendering the metrics reads the files of
+all processes and adds them up, counters of exited workers are kept, gauges only count for running workers.
+
+The metrics are not served by the app itself, it is reachable through the proxy. The gunicorn master serves them on
+``/metrics`` at config.Metrics.ADDRESS, a loopback address by default, see :func:`serve`.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, NamedTuple
+
+import trucksimulator.config as config
+
+# upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# a file starts with the number of used bytes, followed by entries of key length, key padded to 8 bytes and value
+_USED = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_SIZE = 1 << 16
+_FILE_NAME = re.compile(r"^(counter|gauge)_(\d+)\.db$")
+
+
+class Metric(NamedTuple):
+    """
+    :ivar str name: The metric's name
+    :ivar str kind: ``counter``, ``gauge`` or ``histogram``
+    :ivar str help: Description shown on /metrics
+    """
+
+    name: str
+    kind: str
+    help: str
+
+
+INTERACTION_SECONDS = Metric(
+    "trucksimulator_interaction_duration_seconds", "histogram", "Time spent running interaction handlers"
+)
+ERRORS = Metric("trucksimulator_errors_total", "counter", "Interactions answered by an error handler")
+DATABASE_QUERIES = Metric("trucksimulator_database_queries_total", "counter", "Database queries run by interactions")
+DATABASE_SECONDS = Metric(
+    "trucksimulator_database_query_seconds_total", "counter", "Time interactions spent running database queries"
+)
+CACHE_LOOKUPS = Metric("trucksimulator_cache_lookups_total", "counter", "In-process cache lookups by result")
+
+# stats of per-process components that are current values, everything else in their stats is counted up
+_PROCESS_GAUGES = {"size", "idle", "workers", "queued", "queue_size"}
+# settings, adding them up over the workers means nothing
+_PROCESS_SETTINGS = {"threshold"}
+__metrics__: dict[str, Metric] = {
+    metric.name: metric for metric in (INTERACTION_SECONDS, ERRORS, DATABASE_QUERIES, DATABASE_SECONDS, CACHE_LOOKUPS)
+}
+
+
+class ValueFile:
+    """
+    A memory mapped file of named values, written by a single process
+
+    :ivar str path: The file's path
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a+b")  # pylint: disable=consider-using-with
+        if os.fstat(self._file.fileno()).st_size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _USED.unpack_from(self._map)[0] or _USED.size
+        self._positions = {key: position for key, _, position in _entries(self._map, self._used)}
+
+    def _add(self, key: str) -> int:
+        encoded = key.encode()
+        padding = -(_LENGTH.size + len(encoded)) % 8
+        position = self._used + _LENGTH.size + len(encoded) + padding
+        if position + _VALUE.size > len(self._map):
+            self._file.truncate(len(self._map) * 2)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        _LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _LENGTH.size : self._used + _LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used = position + _VALUE.size
+        # written last, readers never see an unfinished entry
+        _USED.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def add(self, key: str, amount: float) -> None:
+        """
+        :param str key: The value's key
+        :param float amount: Added to the value
+        """
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add(key)
+        _VALUE.pack_into(self._map, position, _VALUE.unpack_from(self._map, position)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        """
+        :param str key: The value's key
+        :param float value: The new value
+        """
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add(key)
+        _VALUE.pack_into(self._map, position, value)
+
+
+def _entries(data, used: int) -> Iterator[tuple[str, float, int]]:
+    """
+    :return: Key, value and position of the value for every entry
+    """
+    offset = _USED.size
+    while offset < used:
+        length = _LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + _LENGTH.size : offset + _LENGTH.size + length]).decode()
+        position = offset + _LENGTH.size + length + (-(_LENGTH.size + length) % 8)
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        offset = position + _VALUE.size
+
+
+def _read(path: str) -> Iterator[tuple[str, float]]:
+    with open(path, "rb") as value_file:
+        data = value_file.read()
+    if len(data) < _USED.size:
+        return
+    for key, value, _ in _entries(data, _USED.unpack_from(data)[0]):
+        yield key, value
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@lru_cache(maxsize=4096)
+def _key(name: str, labels: tuple) -> str:
+    return json.dumps([name, labels])
+
+
+class Store:
+    """
+    The value files of the current process, reopened after forking
+
+    :ivar str directory: Directory shared by all processes
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets the files of the parent process, used after forking"""
+        self._pid = os.getpid()
+        self._files: dict[str, ValueFile] = {}
+
+    def _get_file(self, kind: str) -> ValueFile:
+        if self._pid != os.getpid():
+            self._reset()
+        value_file = self._files.get(kind)
+        if value_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            value_file = self._files[kind] = ValueFile(f"{self.directory}/{kind}_{self._pid}.db")
+        return value_file
+
+    def add(self, name: str, labels: tuple, amount: float) -> None:
+        """Adds to a counter"""
+        with self._lock:
+            self._get_file("counter").add(_key(name, labels), amount)
+
+    def set(self, name: str, labels: tuple, value: float, gauge: bool) -> None:
+        """Sets a gauge, or a counter that is counted elsewhere"""
+        with self._lock:
+            self._get_file("gauge" if gauge else "counter").set(_key(name, labels), value)
+
+    def collect(self) -> dict[tuple[str, tuple], float]:
+        """
+        :return: The values of all processes added up, keyed by name and labels
+        """
+        values: dict[tuple[str, tuple], float] = {}
+        for file_name in sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else ():
+            match = _FILE_NAME.match(file_name)
+            if match is None or (match.group(1) == "gauge" and not _alive(int(match.group(2)))):
+                continue
+            for key, value in _read(f"{self.directory}/{file_name}"):
+                name, labels = json.loads(key)
+                series = (name, tuple(tuple(label) for label in labels))
+                values[series] = values.get(series, 0.0) + value
+        return values
+
+    def mark_process_dead(self, pid: int) -> None:
+        """
+        Drops the gauges of an exited process, its counters are kept
+
+        :param int pid: The process id
+        """
+        try:
+            os.remove(f"{self.directory}/gauge_{pid}.db")
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Deletes the files of all processes, used when the app is started"""
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if _FILE_NAME.match(file_name):
+                os.remove(f"{self.directory}/{file_name}")
+
+
+store = Store(config.Metrics.DIRECTORY)
+
+
+def inc(metric: Metric, amount: float = 1.0, **labels: str) -> None:
+    """
+    Counts up a counter
+
+    :param Metric metric: The counter
+    :param float amount: Added to the counter
+    :param labels: The series' labels
+    """
+    store.add(metric.name, tuple(labels.items()), amount)
+
+
+def observe(metric: Metric, value: float, **labels: str) -> None:
+    """
+    Records a value in a histogram
+
+    :param Metric metric: The histogram
+    :param float value: The observed value
+    :param labels: The series' labels
+    """
+    label_items = tuple(labels.items())
+    for bound in BUCKETS:
+        if value <= bound:
+            store.add(metric.name + "_bucket", label_items + (("le", str(bound)),), 1.0)
+            break
+    store.add(metric.name + "_sum", label_items, value)
+    store.add(metric.name + "_count", label_items, 1.0)
+
+
+def lookup(cache: str, hit: bool) -> None:
+    """
+    Counts a cache lookup
+
+    :param str cache: Name of the cache
+    :param bool hit: Whether the cache had the value
+    """
+    store.add(CACHE_LOOKUPS.name, (("cache", cache), ("result", "hit" if hit else "miss")), 1.0)
+
+
+def publish(component: str, stats: dict) -> None:
+    """
+    Publishes the stats of a per-process component like the database pool
+
+    :param str component: Name of the component, used as metric prefix
+    :param dict stats: The component's stats, as returned by its ``stats()``
+    """
+    for key, value in stats.items():
+        if key in _PROCESS_SETTINGS:
+            continue
+        if key in _PROCESS_GAUGES:
+            name = f"trucksimulator_{component}_{key}"
+            __metrics__.setdefault(name, Metric(name, "gauge", f"{key} of the {component}, per worker"))
+            store.set(name, (), value, gauge=True)
+        else:
+            # times are in seconds, counters are summed up per process
+            base = key[: -len("_time")] + "_seconds" if key.endswith("_time") else key
+            name = f"trucksimulator_{component}_{base}_total"
+            __metrics__.setdefault(name, Metric(name, "counter", f"{key} of the {component}"))
+            store.set(name, (), value, gauge=False)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _family(name: str) -> str:
+    """
+    :return: The name of the metric a sample belongs to, histograms have samples with suffixes
+    """
+    for suffix in ("_bucket", "_sum", "_count"):
+        base = name[: -len(suffix)]
+        if name.endswith(suffix) and base in __metrics__ and __metrics__[base].kind == "histogram":
+            return base
+    return name
+
+
+def _render_histogram(name: str, samples: list[tuple[str, tuple, float]]) -> list[str]:
+    series: dict[tuple, dict] = {}
+    for sample, labels, value in samples:
+        if sample.endswith("_bucket"):
+            bound = float(dict(labels)["le"])
+            series.setdefault(tuple(label for label in labels if label[0] != "le"), {})[bound] = value
+        else:
+            series.setdefault(labels, {})[sample[len(name) :]] = value
+    lines = []
+    for labels, values in sorted(series.items()):
+        # buckets are stored per bound, Prometheus expects them cumulative
+        cumulative = 0.0
+        for bound in BUCKETS:
+            cumulative += values.get(bound, 0.0)
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {_format_value(cumulative)}")
+        count = _format_value(values.get("_count", 0.0))
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values.get('_sum', 0.0))}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return lines
+
+
+def render() -> str:
+    """
+    :return: The metrics of all processes in the Prometheus text format
+    """
+    families: dict[str, list[tuple[str, tuple, float]]] = {}
+    for (name, labels), value in store.collect().items():
+        families.setdefault(_family(name), []).append((name, labels, value))
+    lines = []
+    for name, samples in sorted(families.items()):
+        # stats published by the workers aren't registered in the process rendering them
+        metric = __metrics__.get(name) or Metric(name, "counter" if name.endswith("_total") else "gauge", name)
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        if metric.kind == "histogram":
+            lines += _render_histogram(name, samples)
+        else:
+            lines += [
+                f"{sample}{_format_labels(labels)} {_format_value(value)}" for sample, labels, value in sorted(samples)
+            ]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+
+def serve(address: str = config.Metrics.ADDRESS) -> ThreadingHTTPServer:
+    """
+    Serves the metrics of all processes on a background thread
+
+    :param str address: ``host:port`` to listen on
+    :return: The running server
+    """
+    host, port = address.rsplit(":", 1)
+    server = ThreadingHTTPServer((host.strip("[]"), int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
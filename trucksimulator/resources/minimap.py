@@ -0,0 +1,83 @@
+"""
+The minimap shown in the drive embed. Background, map border and place icons only depend on the map, so they are
+rendered once into a tile layer covering the whole map. Every render slices a window out of that layer and only
+places company logos and the player's truck on top of it.
+"""
+from trucksimulator import config
+from trucksimulator.resources import items, places, symbols
+
+# distance from the minimap's center to its edge
+RADIUS = 3
+
+__layer__: list[list[str]] = []
+# the place list the layer was built from
+__layer_source__: list = []
+
+
+def _tile(x: int, y: int) -> str:
+    """
+    :return: The static tile at a position
+    """
+    if x >= 0 and y >= 0:
+        place = places.get((y << 16) + x)
+        if place is not None:
+            return f"<:i:{items.get(place.produced_item).emoji}>"
+    on_border_x = x in (-1, config.MAP_BORDER + 1) and -1 <= y <= config.MAP_BORDER + 1
+    on_border_y = y in (-1, config.MAP_BORDER + 1) and -1 <= x <= config.MAP_BORDER + 1
+    if on_border_x or on_border_y:
+        return ":small_orange_diamond:"
+    return symbols.MAP_BACKGROUND
+
+
+def build_layer() -> list[list[str]]:
+    """
+    Renders the static tiles of the whole map, including a margin around the border
+
+    :return: The tile rows, indexed by y + RADIUS and x + RADIUS
+    """
+    coordinates = range(-RADIUS, config.MAP_BORDER + RADIUS + 1)
+    return [[_tile(x, y) for x in coordinates] for y in coordinates]
+
+
+def get_layer() -> list[list[str]]:
+    """
+    :return: The static tile layer, rebuilt if the place catalog changed
+    """
+    global __layer__, __layer_source__  # pylint: disable=global-statement
+    if places.get_all() is not __layer_source__:
+        __layer_source__ = places.get_all()
+        __layer__ = build_layer()
+    return __layer__
+
+
+def render(position, truck_emoji: str, headquarters: dict) -> str:
+    """
+    Renders the minimap around a position
+
+    :param position.Position position: Center of the minimap
+    :param str truck_emoji: Emoji shown in the center
+    :param dict headquarters: Maps hq positions as int to objects with a ``logo``
+    :return: The minimap, one line per row
+    """
+    layer = get_layer()
+    size = len(layer)
+    x_start = position.x - RADIUS
+    rows = []
+    for y in range(position.y + RADIUS, position.y - RADIUS - 1, -1):
+        if 0 <= y + RADIUS < size and 0 <= x_start + RADIUS and x_start + 3 * RADIUS < size:
+            # slicing copies the row, overlays don't touch the layer
+            row = layer[y + RADIUS][x_start + RADIUS : x_start + 3 * RADIUS + 1]
+        else:
+            # somewhere off the map
+            row = [_tile(x, y) for x in range(x_start, x_start + 2 * RADIUS + 1)]
+        if headquarters and y >= 0:
+            for j in range(2 * RADIUS + 1):
+                x = x_start + j
+                if x < 0:
+                    continue
+                company = headquarters.get((y << 16) + x)
+                if company is not None and places.get((y << 16) + x) is None:
+                    row[j] = company.logo
+        rows.append(row)
+    rows[RADIUS][RADIUS] = truck_emoji
+    return "".join("".join(row) + "\n" for row in rows)
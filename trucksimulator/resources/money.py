@@ -0,0 +1,125 @@
+"""
+Every change of a player's money goes through this module.
+Debits check the balance in the same statement that changes it, so a player can't spend the same money twice, and
+every movement is appended to the ledger. Inside a unit of work credits and ledger rows are written when the
+interaction is done, together with the player's other changes.
+"""
+from time import time
+from typing import Optional
+
+from trucksimulator.resources import database, unitofwork
+from trucksimulator.resources.players import NotEnoughMoney, Player
+from trucksimulator.resources.unitofwork import Increment
+
+REASON_JOB = "job"
+REASON_MINIJOB = "minijob"
+REASON_REFILL = "refill"
+REASON_GIVE = "give"
+REASON_SLOTS = "slots"
+REASON_TRUCK = "truck"
+REASON_HITCHHIKE = "hitchhike"
+
+LEDGER_COLUMNS = ("player_id", "amount", "reason", "counterparty", "time")
+
+
+def _record(player: Player, amount: int, reason: str, counterparty: Optional[str]) -> None:
+    row = (player.id, amount, reason, counterparty, int(time()))
+    running_unit_of_work = unitofwork.current()
+    if running_unit_of_work is not None:
+        running_unit_of_work.append("ledger", LEDGER_COLUMNS, row)
+    else:
+        database.execute(
+            f"INSERT INTO ledger({', '.join(LEDGER_COLUMNS)}) VALUES ({', '.join(['%s'] * len(LEDGER_COLUMNS))})",
+            row,
+            standalone=True,
+        )
+
+
+def _apply(player: Player, delta: int, required: int) -> None:
+    """
+    Changes a player's balance by delta if the balance is at least required, in a single conditional UPDATE.
+    A pending change of the player's money is written by the same statement.
+
+    :raises NotEnoughMoney: If the balance is lower than required
+    """
+    if player.money < required:
+        raise NotEnoughMoney()
+    running_unit_of_work = unitofwork.current()
+    pending = None
+    if running_unit_of_work is not None:
+        pending = running_unit_of_work.take(player.__table__, player.__key__, player.id, "money")
+    if pending is not None and not isinstance(pending, Increment):
+        # the balance was set in this interaction, it is already checked
+        running_unit_of_work.register(player.__table__, player.__key__, player.id, "money", pending + delta)
+    else:
+        pending_delta = pending.delta if pending is not None else 0
+        changed = database.execute(
+            "UPDATE players SET money=money+%s WHERE id=%s AND money>=%s",
+            (pending_delta + delta, player.id, required - pending_delta),
+        )
+        if changed == 0 and pending_delta + delta != 0:
+            if pending is not None:
+                running_unit_of_work.register_increment(
+                    player.__table__, player.__key__, player.id, "money", pending_delta
+                )
+            raise NotEnoughMoney()
+    player.set_stored(money=player.money + delta)
+
+
+def credit(player: Player, amount: int, reason: str, counterparty: Optional[str] = None) -> None:
+    """
+    Adds money to a player's account
+
+    :param players.Player player: The receiving player
+    :param int amount: Amount of money that should be added
+    :param str reason: One of the REASON constants, stored in the ledger
+    :param str counterparty: Id of the player the money came from
+    """
+    player.increment(money=amount)
+    _record(player, amount, reason, counterparty)
+
+
+def debit(player: Player, amount: int, reason: str, counterparty: Optional[str] = None) -> None:
+    """
+    Takes money from a player's account if the balance is high enough. Negative amounts are credited.
+
+    :param players.Player player: The paying player
+    :param int amount: Amount of money that should be removed
+    :param str reason: One of the REASON constants, stored in the ledger
+    :param str counterparty: Id of the player receiving the money
+    :raises NotEnoughMoney: In case the amount is too high
+    """
+    if amount <= 0:
+        credit(player, -amount, reason, counterparty)
+        return
+    _apply(player, -amount, amount)
+    _record(player, -amount, reason, counterparty)
+
+
+def wager(player: Player, stake: int, payout: int, reason: str) -> None:
+    """
+    Settles a game in one statement: the player needs at least the stake and gets stake and payout exchanged
+
+    :param players.Player player: The playing player
+    :param int stake: Amount of money that's bet
+    :param int payout: Amount of money that's won, 0 for a loss
+    :param str reason: One of the REASON constants, stored in the ledger
+    :raises NotEnoughMoney: In case the stake is too high
+    """
+    _apply(player, payout - stake, stake)
+    _record(player, payout - stake, reason, None)
+
+
+def transfer(donator: Player, acceptor: Player, amount: int, reason: str = REASON_GIVE) -> None:
+    """
+    Moves money from one player to another, both sides are written in the same transaction
+
+    :param players.Player donator: The paying player
+    :param players.Player acceptor: The receiving player
+    :param int amount: Amount of money that should be moved
+    :param str reason: One of the REASON constants, stored in the ledger
+    :raises NotEnoughMoney: In case the donator doesn't have enough money
+    """
+    with unitofwork.unit_of_work():
+        debit(donator, amount, reason, counterparty=acceptor.id)
+        credit(acceptor, amount, reason, counterparty=donator.id)
@@ -0,0 +1,170 @@
+"""
+This module contains the base class for objects that represent a row in the database.
+
+Every model is in one of three states:
+    - LOADING: The object is being constructed, assignments only change the object
+    - ATTACHED: The object represents a stored row, assignments are written to the database
+    - DETACHED: The object is not (or no longer) stored, assignments only change the object
+
+Objects hydrated with :meth:`PersistedModel.from_row` are attached, objects created directly are detached until they
+are attached explicitly, usually after they got inserted.
+"""
+from dataclasses import field, fields
+from typing import Any
+
+from trucksimulator.resources import database, unitofwork
+
+LOADING = 0
+ATTACHED = 1
+DETACHED = 2
+
+
+def transient(default: Any = None) -> Any:
+    """
+    Declares a dataclass field that is never written to the database
+
+    :param default: The field's default value
+    """
+    return field(default=default, init=False, repr=False, compare=False, metadata={"transient": True})
+
+
+class PersistedModel:
+    """
+    Base class for slotted dataclasses stored in the database.
+    Subclasses set ``__table__``, ``__key__`` and ``__converters__``; the column mapping is compiled once per class.
+
+    :cvar str __table__: The table the rows are stored in
+    :cvar str __key__: The table's primary key column
+    :cvar dict __converters__: Maps columns to functions that turn the attribute into its database value
+    :cvar tuple __columns__: All stored columns in field order, compiled from the dataclass fields
+    :cvar dict __mapping__: Maps every stored column to its converter (or None), in field order
+    """
+
+    __slots__ = ("_state",)
+    __table__: str = ""
+    __key__: str = "id"
+    __converters__: dict = {}
+    __columns__: tuple = ()
+    __mapping__: dict = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # dataclass(slots=True) recreates the class, the fields are only known for the final one
+        if "__dataclass_fields__" in cls.__dict__:
+            cls.__columns__ = tuple(f.name for f in fields(cls) if not f.metadata.get("transient"))
+            cls.__mapping__ = {column: cls.__converters__.get(column) for column in cls.__columns__}
+
+    def __new__(cls, *args, **kwargs):
+        model = super().__new__(cls)
+        object.__setattr__(model, "_state", LOADING)
+        return model
+
+    def __post_init__(self) -> None:
+        self._convert()
+        object.__setattr__(self, "_state", DETACHED)
+
+    def _convert(self) -> None:
+        """Converts raw database values into their python types, called while loading"""
+
+    @classmethod
+    def from_row(cls, record: dict):
+        """
+        Hydrates an attached object from a database record
+
+        :param dict record: The record as returned by the database module
+        :return: The attached object
+        """
+        model = cls(**record)
+        object.__setattr__(model, "_state", ATTACHED)
+        return model
+
+    @property
+    def attached(self) -> bool:
+        """
+        :return: Whether assignments to this object are written to the database
+        """
+        return self._state == ATTACHED
+
+    def attach(self) -> None:
+        """Marks the object as stored, following assignments are written to the database"""
+        object.__setattr__(self, "_state", ATTACHED)
+
+    def detach(self) -> None:
+        """Marks the object as not stored, following assignments only change the object"""
+        object.__setattr__(self, "_state", DETACHED)
+
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        """
+        Overrides the setattr method to update the database when a column of an attached object is changed.
+        Inside a unit of work the change is collected and written when the interaction is done.
+
+        :param str __name: Name of the attribute
+        :param Any __value: Value of the attribute
+        """
+        object.__setattr__(self, __name, __value)
+        if self._state == ATTACHED and __name in self.__mapping__:
+            converter = self.__mapping__[__name]
+            self._write(__name, converter(__value) if converter else __value)
+            self._written(__name)
+
+    def set_stored(self, **values: Any) -> None:
+        """
+        Sets attributes to values that are already stored in the database, nothing is written
+
+        :param Any values: Maps attributes to their values
+        """
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def increment(self, **deltas: int) -> None:
+        """
+        Adds to numeric columns on the server with ``SET column = column + %s``, so concurrent interactions changing the
+        same row don't overwrite each other.
+        Inside a unit of work the increments are collected and written with the row's other changes when the
+        interaction is done. The object's values are then only approximate: they are the loaded values plus this
+        interaction's deltas and miss increments other interactions made meanwhile, the stored values include them.
+        They aren't read back, the response is built before the changes are flushed. Outside of a unit of work the
+        increments are written immediately and the new values are read back in the same transaction.
+
+        :param int deltas: Maps columns to the amount that should be added, negative amounts decrement
+        """
+        for column, delta in deltas.items():
+            object.__setattr__(self, column, getattr(self, column) + delta)
+        if self._state != ATTACHED:
+            return
+        key = getattr(self, self.__key__)
+        running_unit_of_work = unitofwork.current()
+        if running_unit_of_work is not None:
+            for column, delta in deltas.items():
+                running_unit_of_work.register_increment(self.__table__, self.__key__, key, column, delta)
+        else:
+            assignments = ", ".join(f"{column}={column}+%s" for column in deltas)
+            with database.transaction():
+                database.execute(
+                    f"UPDATE {self.__table__} SET {assignments} WHERE {self.__key__}=%s", (*deltas.values(), key)
+                )
+                record = database.fetchone(
+                    f"SELECT {', '.join(deltas)} FROM {self.__table__} WHERE {self.__key__}=%s", (key,)
+                )
+            self.set_stored(**record)
+        for column in deltas:
+            self._written(column)
+
+    def _written(self, column: str) -> None:
+        """Called after a column of an attached object got changed, used to invalidate caches"""
+
+    def _write(self, column: str, value: Any) -> None:
+        key = getattr(self, self.__key__)
+        running_unit_of_work = unitofwork.current()
+        if running_unit_of_work is not None:
+            running_unit_of_work.register(self.__table__, self.__key__, key, column, value)
+        else:
+            database.execute(f"UPDATE {self.__table__} SET {column}=%s WHERE {self.__key__}=%s", (value, key))
+
+    def __iter__(self):
+        """
+        :return: An iterator over all database-ready column values in field order
+        """
+        for column, converter in self.__mapping__.items():
+            value = getattr(self, column)
+            yield converter(value) if converter else value
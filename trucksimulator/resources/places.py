@@ -1,41 +1,13 @@
 """
 Places are spread all over the map. They accept and produce certain items, used in jobs and minijobs
 """
-import sqlite3
-from dataclasses import dataclass
 from typing import Optional, Union
 
+from trucksimulator.resources import catalog
 from trucksimulator.resources import position as pos
 from trucksimulator.resources import symbols
-import trucksimulator.config as config
 
-
-@dataclass
-class Place:
-    """
-    :ivar str name: The name of the place
-    :ivar position.Postion position: the Place's position as int
-    :ivar list available_actions: all local available commands stored as strings in a list
-    :ivar str produced_item: Item this place produces in jobs.
-    :ivar str accepted_item: Item this place rewards
-    :ivar int item_reward: money paid when the accepted_item is unloaded
-    """
-
-    name: str
-    position: pos.Position
-    available_actions: list
-    produced_item: Optional[str]
-    accepted_item: Optional[str]
-    item_reward: Optional[int]
-
-    def __post_init__(self) -> None:
-        if isinstance(self.position, int):
-            self.position = pos.Position.from_int(self.position)
-        if isinstance(self.available_actions, str):
-            self.available_actions = self.available_actions.split(";")
-
-    def __str__(self) -> str:
-        return self.name
+Place = catalog.Place
 
 
 def get_direction(player, target: Place) -> int:
@@ -57,35 +29,81 @@ def get_direction(player, target: Place) -> int:
     )
 
 
-def get(position: Union[int, pos.Position]) -> Place:
+def get(position: Union[int, pos.Position]) -> Optional[Place]:
     """
     Returns a place object on a specific position
     If no places is registered there, None is returned
 
-    :param list/str position: Postion of the place
+    :param int/position.Position position: Postion of the place
     :return: The corresponding place
     """
-    for place in get_all():
-        if int(place.position) == int(position):
-            return place
-    # fix this
-    return None
+    return catalog.get().places_by_position.get(int(position))
 
 
-def get_all() -> list:
+def get_by_name(name: str) -> Place:
     """
-    :return: All places in a list
+    Returns a place by its name
+
+    :param str name: Name of the place
+    :raises PlaceNotFound: In case no place has this name
+    :return: The corresponding place
     """
-    return __all_places__
+    try:
+        return catalog.get().places_by_name[name]
+    except KeyError as error:
+        raise PlaceNotFound() from error
 
 
-__con__ = sqlite3.connect(config.BASE_PATH + "/resources/objects.db")
-__cur__ = __con__.cursor()
+def get_in_box(x_min: int, y_min: int, x_max: int, y_max: int) -> dict[int, Place]:
+    """
+    Returns all places inside a rectangle, borders included
 
-__all_places__ = []
-__cur__.execute("SELECT * FROM places")
-for tup in __cur__.fetchall():
-    __all_places__.append(Place(*tup))
+    :param int x_min: Left border
+    :param int y_min: Lower border
+    :param int x_max: Right border
+    :param int y_max: Upper border
+    :return: The places found, keyed by their position as int
+    """
+    places_by_position = catalog.get().places_by_position
+    found = {}
+    # positions can't be negative, their int representation would clash with other positions
+    for y in range(max(y_min, 0), y_max + 1):
+        for x in range(max(x_min, 0), x_max + 1):
+            place = places_by_position.get((y << 16) + x)
+            if place is not None:
+                found[(y << 16) + x] = place
+    return found
+
+
+def get_all() -> tuple[Place, ...]:
+    """
+    :return: All places
+    """
+    return catalog.get().places
+
+
+def get_producing(item_name: str) -> tuple[Place, ...]:
+    """
+    :param str item_name: Name of the item
+    :return: All places producing the item
+    """
+    return catalog.get().producers.get(item_name, ())
+
+
+def get_accepting(item_name: str) -> tuple[Place, ...]:
+    """
+    :param str item_name: Name of the item
+    :return: All places rewarding the item
+    """
+    return catalog.get().acceptors.get(item_name, ())
+
+
+def get_by_action(action: str) -> tuple[Place, ...]:
+    """
+    :param str action: A local command like ``refill`` or ``gambling``
+    :return: All places offering the command
+    """
+    return catalog.get().places_by_action.get(action, ())
 
 
 class PlaceNotFound(Exception):
@@ -1,18 +1,19 @@
-# pylint: disable=invalid-name,attribute-defined-outside-init
+# pylint: disable=invalid-name
 """
 This module contains the Player class, several methods to operate with players in the database and
 the DrivingPlayer, used to manage driving sessions
 """
-import inspect
 import logging
 from dataclasses import dataclass, field
 from time import time
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional
 
-from i18n import t
-from trucksimulator.resources import database, items, levels
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import database, identity, items, levels, symbols, trucks, unitofwork
 from trucksimulator.resources import position as pos
+from trucksimulator.resources.persistence import PersistedModel, transient
 from trucksimulator.resources.jobs import Job
+from trucksimulator.resources.unitofwork import Increment
 from trucksimulator.utils import commatize
 
 
@@ -29,8 +30,32 @@ def _format_items_to_db(item_list: list) -> str:
     return db_items[: len(db_items) - 1]
 
 
-@dataclass
-class Player:
+# marks relations that were not loaded yet
+NOT_LOADED = object()
+
+# conditional UPDATEs add_xp sends before giving up, every collision means another interaction changed the xp
+ADD_XP_ATTEMPTS = 3
+
+
+class CompanyHeader(NamedTuple):
+    """
+    The company columns shown next to a player
+
+    :ivar int id: Internal company id
+    :ivar str name: Name of the company
+    :ivar str logo: Emoji displayed as logo on the map
+    """
+
+    id: int
+    name: str
+    logo: str
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass(slots=True)
+class Player(PersistedModel):
     """
     A class representing a Player in the database
 
@@ -63,8 +88,13 @@ class Player:
     loaded_items: list = field(default_factory=lambda: [])
     company: Optional[int] = None
     last_vote: int = 0
+    _job: Optional[Job] = transient(NOT_LOADED)
+    _company_header: Optional[CompanyHeader] = transient(NOT_LOADED)
+
+    __table__ = "players"
+    __converters__ = {"position": int, "loaded_items": _format_items_to_db}
 
-    def __post_init__(self) -> None:
+    def _convert(self) -> None:
         if isinstance(self.position, int):
             self.position = pos.Position.from_int(self.position)
         if isinstance(self.loaded_items, str):
@@ -75,56 +105,71 @@ class Player:
                     loaded_items.append(items.get(item_name))
             self.loaded_items = loaded_items
 
-    def __iter__(self):
-        self._n = 0
-        return self
-
-    def __next__(self):
-        if self._n < len(vars(self)) - 1:
-            attr = list(vars(self).keys())[self._n]
-            self._n += 1
-            if attr == "position":
-                return int(self.__getattribute__(attr))
-            if attr == "loaded_items":
-                return _format_items_to_db(self.__getattribute__(attr))
-            return self.__getattribute__(attr)
-        raise StopIteration
-
     def __str__(self) -> str:
         return f"**{self.name}**#{self.discriminator}"
 
-    def __setattr__(self, __name: str, __value: Any) -> None:
-        """
-        Overrides the setattr method to update the database when a value is changed
-
-        :param str __name: Name of the attribute
-        :param Any __value: Value of the attribute
-        """
-        context = inspect.getouterframes(inspect.currentframe())[1][3]
-        if context not in ["__init__", "__post_init__", "__next__", "__iter__"]:
-            if __name == "position":
-                __value_db = int(__value)
-            elif __name == "loaded_items":
-                __value_db = _format_items_to_db(__value)
-            else:
-                __value_db = __value
-            sql_base = f"UPDATE players SET {__name}=%s WHERE id=%s"
-            database.execute(sql_base, (__value_db, self.id))
-        super().__setattr__(__name, __value)
-
     @property
     def rank(self) -> int:
         """
+        Counts the players with a higher level or more xp on the same level, uses the level_xp_id index
+
         :return: The player's rank sorted by level
         """
-        return database.fetchone(
-            "SELECT player_rank FROM (SELECT id, (rank() OVER (ORDER BY level DESC, xp DESC)) AS player_rank FROM players) AS ranks WHERE id=%s",
-            (self.id,),
-        )["player_rank"]
+        return (
+            database.fetchone(
+                "SELECT COUNT(*) AS better FROM players WHERE level > %s OR (level = %s AND xp > %s)",
+                (self.level, self.level, self.xp),
+            )["better"]
+            + 1
+        )
+
+    def move(self, direction: int) -> bool:
+        """
+        Drives one field into a direction. Position, miles, truck miles and gas are written with one conditional UPDATE
+        that only matches while the player is still at the loaded position, so a double click moves only once.
+        The statement is atomic on its own and sent without starting a transaction, also inside a unit of work, so a
+        press costs the player's load and this UPDATE. It only joins a transaction the unit of work already started.
+
+        :param int direction: One of the directional symbols
+        :return: Whether the player moved. If the move collided with another one, the player's current values are
+            reloaded
+        """
+        if direction not in symbols.get_drive_position_symbols(self.position):
+            return False
+        new_position = pos.Position(self.position.x, self.position.y)
+        if direction == symbols.LEFT:
+            new_position.x -= 1
+        elif direction == symbols.UP:
+            new_position.y += 1
+        elif direction == symbols.DOWN:
+            new_position.y -= 1
+        elif direction == symbols.RIGHT:
+            new_position.x += 1
+        consumption = trucks.get(self.truck_id).gas_consumption
+        moved = database.execute(
+            "UPDATE players SET position=%s, miles=miles+1, truck_miles=truck_miles+1, gas=gas-%s "
+            "WHERE id=%s AND position=%s",
+            (int(new_position), consumption, self.id, int(self.position)),
+            standalone=True,
+        )
+        if not moved:
+            record = database.fetchone("SELECT position, miles, truck_miles, gas FROM players WHERE id=%s", (self.id,))
+            record["position"] = pos.Position.from_int(record["position"])
+            self.set_stored(**record)
+            return False
+        self.set_stored(
+            position=new_position,
+            miles=self.miles + 1,
+            truck_miles=self.truck_miles + 1,
+            gas=self.gas - consumption,
+        )
+        return True
 
     def add_xp(self, amount: int) -> str:
         """
-        Add xp to the player and performs a level up if needed
+        Add xp to the player and performs a level up if needed. The new level and xp are written with one conditional
+        UPDATE that only matches while both are still at the loaded values. If another interaction changed them first,
+        they are reloaded and the level up is computed again.
 
         :param int amount: Amount of xp that should be added
         :return: A string containing a message reflecting the xp increase, displayed in some embeds
@@ -132,31 +177,45 @@ class Player:
         answer = "\n" + t("leveling.xp", amount=commatize(amount))
         if round(time()) - self.last_vote < 1800:
             amount = amount * 2
-        self.xp = int(self.xp) + amount
-        while int(self.xp) >= levels.get_next_xp(self.level):
-            self.xp -= levels.get_next_xp(self.level)
-            self.level += 1
-            answer += "\n" + t("leveling.levelup", level=self.level)
-        return answer
-
-    def add_money(self, amount) -> None:
-        """
-        Add money to the players account
-
-        :param int amount: Amount of money that should be added
-        """
-        self.money += amount
-
-    def debit_money(self, amount) -> None:
-        """
-        Debit money from the players account
-
-        :param int amount: Amount of money that should be removed
-        :raises NotEnoughMoney: In case the amount in too high
-        """
-        if amount > self.money:
-            raise NotEnoughMoney()
-        self.money -= amount
+        if amount == 0:
+            return answer
+        pending: dict[str, Any] = {}
+        running_unit_of_work = unitofwork.current()
+        if running_unit_of_work is not None:
+            # changes of this interaction that weren't written yet are written by the statement
+            for column in ("level", "xp"):
+                pending[column] = running_unit_of_work.take(self.__table__, self.__key__, self.id, column)
+        for _ in range(ADD_XP_ATTEMPTS):
+            level, xp = self.level, int(self.xp) + amount
+            level_ups = ""
+            while xp >= levels.get_next_xp(level):
+                xp -= levels.get_next_xp(level)
+                level += 1
+                level_ups += "\n" + t("leveling.levelup", level=level)
+            conditions, args = ["id=%s"], [self.id]
+            for column in ("level", "xp"):
+                value = pending.get(column)
+                # a value set in this interaction is overwritten anyway
+                if value is None or isinstance(value, Increment):
+                    conditions.append(f"{column}=%s")
+                    args.append(getattr(self, column) - (value.delta if value is not None else 0))
+            if database.execute(
+                f"UPDATE players SET level=%s, xp=%s WHERE {' AND '.join(conditions)}",
+                (level, xp, *args),
+                standalone=running_unit_of_work is None,
+            ):
+                self.set_stored(level=level, xp=xp)
+                return answer + level_ups
+            record = database.fetchone("SELECT level, xp FROM players WHERE id=%s", (self.id,))
+            self.set_stored(
+                **{
+                    column: record[column] + pending[column].delta
+                    for column in ("level", "xp")
+                    if isinstance(pending.get(column), Increment)
+                },
+                **{column: record[column] for column in ("level", "xp") if pending.get(column) is None},
+            )
+        raise RuntimeError(f"The xp of {self.id} kept changing while adding {amount}")
 
     def load_item(self, item: items.Item) -> None:
         """
@@ -184,17 +243,18 @@ class Player:
             new_items.remove(loaded_item)
         self.loaded_items = new_items
 
-    @staticmethod
-    def add_job(job: Job) -> None:
+    def add_job(self, job: Job) -> None:
         """
         Inserts a Job object into the players database
 
         :param jobs.Job job: Job that should be inserted
         """
-        placeholders = ", ".join(["%s"] * len(vars(job)))
-        columns = ", ".join(vars(job).keys())
+        placeholders = ", ".join(["%s"] * len(job.__columns__))
+        columns = ", ".join(job.__columns__)
         sql = f"INSERT INTO jobs({columns}) VALUES ({placeholders})"
         database.execute(sql, tuple(job))
+        job.attach()
+        self._job = job
 
     @staticmethod
     def update_job(job: Job, state: int) -> None:
@@ -204,27 +264,49 @@ class Player:
         :param jobs.Job job: The Job that should be updated
         :param int state: The new state of the job
         """
-        database.execute("UPDATE jobs SET state=%s WHERE player_id=%s", (state, job.player_id))
+        job.state = state
 
-    @staticmethod
-    def remove_job(job: Job) -> None:
+    def remove_job(self, job: Job) -> None:
         """
         Removes a job from the player database
 
         :param jobs.Job job: The Job that should be removed
         """
+        job.detach()
+        running_unit_of_work = unitofwork.current()
+        if running_unit_of_work is not None:
+            running_unit_of_work.discard(job.__table__, job.__key__, job.player_id)
         database.execute("DELETE FROM jobs WHERE player_id=%s", (job.player_id,))
+        self._job = None
 
     def get_job(self) -> Optional[Job]:
         """
-        Get the Players current job
+        Get the Players current job. The job is only queried once per player object.
 
         :return: A job if the player currently has a running job
         """
-        records = database.fetchall("SELECT * FROM jobs WHERE player_id=%s", (self.id,))
-        if len(records) > 0:
-            return Job(**records[0])
-        return None
+        if self._job is NOT_LOADED:
+            record = database.fetchone("SELECT * FROM jobs WHERE player_id=%s", (self.id,))
+            self._job = Job.from_row(record) if record else None
+        return self._job
+
+    def get_company_header(self) -> Optional[CompanyHeader]:
+        """
+        Get name and logo of the player's company
+
+        :return: The company header if the player belongs to a company
+        """
+        if not self.company:
+            return None
+        # also reloaded if the player joined or founded a company after the header was loaded as None
+        if (
+            self._company_header is NOT_LOADED
+            or self._company_header is None
+            or self._company_header.id != self.company
+        ):
+            record = database.fetchone("SELECT id, name, logo FROM companies WHERE id=%s", (self.company,))
+            self._company_header = CompanyHeader(**record) if record else None
+        return self._company_header
 
 
 def insert(player: Player) -> None:
@@ -233,16 +315,18 @@ def insert(player: Player) -> None:
 
     :param Player player: Player that should be inserted
     """
-    placeholders = ", ".join(["%s"] * len(vars(player)))
-    columns = ", ".join(vars(player).keys())
+    placeholders = ", ".join(["%s"] * len(player.__columns__))
+    columns = ", ".join(player.__columns__)
     sql = f"INSERT INTO players({columns}) VALUES ({placeholders})"
     database.execute(sql, tuple(player))
+    player.attach()
+    identity.put("players", player.id, player)
     logging.info("Inserted %s into the database as %s", player.name, tuple(player))
 
 
 def get(id: str, check: str = None) -> Player:
     """
-    Get one player from the database
+    Get one player from the database. Within a request, every player is only queried once.
 
     :param str id: The requested player's id
     :param str check: When given, this method will compare id and check, this is used to verify component "owners"
@@ -250,39 +334,101 @@ def get(id: str, check: str = None) -> Player:
     :raises PlayerNotRegistered: in case a player is not found in the database
     :raises PlayerBlacklisted: in case a player is on the blacklist
     """
-    if not registered(id):
-        raise PlayerNotRegistered(id)
-    if check and id != check:
-        raise WrongPlayer()
+    player = identity.get("players", id)
+    if player is not identity.MISSING:
+        return _check(player, check)
     record = database.fetchone("SELECT * FROM players WHERE id=%s", (id,))
-    player = Player(**record)
+    return _from_record(id, check, record)
+
+
+def get_driving(id: str, check: str = None) -> Player:
+    """
+    Get one player together with their running job and their company header, all in a single query.
+    The player's get_job() and get_company_header() won't query the database again.
+
+    :param str id: The requested player's id
+    :param str check: When given, this method will compare id and check, this is used to verify component "owners"
+    :return: The corresponding player
+    :raises PlayerNotRegistered: in case a player is not found in the database
+    :raises PlayerBlacklisted: in case a player is on the blacklist
+    """
+    player = identity.get("players", id)
+    if (
+        player is not identity.MISSING
+        and player._job is not NOT_LOADED
+        and player._company_header is not NOT_LOADED
+    ):
+        return _check(player, check)
+    record = database.fetchone(_DRIVING_QUERY, (id,))
+    player = _from_record(id, check, record, columns=Player.__columns__)
+    if player._job is NOT_LOADED:
+        if record["job_player_id"] is not None:
+            player._job = Job.from_row({column: record["job_" + column] for column in Job.__columns__})
+        else:
+            player._job = None
+    if player._company_header is NOT_LOADED:
+        if record["company_id"] is not None:
+            player._company_header = CompanyHeader(
+                record["company_id"], record["company_name"], record["company_logo"]
+            )
+        else:
+            player._company_header = None
+    return player
+
+
+_DRIVING_QUERY = (
+    "SELECT players.*, "
+    + ", ".join(f"jobs.{column} AS job_{column}" for column in Job.__columns__)
+    + ", companies.id AS company_id, companies.name AS company_name, companies.logo AS company_logo "
+    "FROM players "
+    "LEFT JOIN jobs ON jobs.player_id=players.id "
+    "LEFT JOIN companies ON companies.id=players.company "
+    "WHERE players.id=%s"
+)
+
+
+def hydrate(record: dict) -> Player:
+    """
+    Turns a players record into a Player. If the request already holds an object for that player, it is reused.
+
+    :param dict record: The player's record
+    :return: The corresponding player
+    """
+    player = identity.get("players", record["id"])
+    if player is identity.MISSING:
+        player = identity.put("players", record["id"], Player.from_row(record))
+    return player
+
+
+def _check(player: Player, check: Optional[str]) -> Player:
+    """
+    :raises WrongPlayer: in case the player's id and check don't match
+    :raises PlayerBlacklisted: in case the player is on the blacklist
+    """
+    if check and player.id != check:
+        raise WrongPlayer()
     if player.xp == -1:
         raise PlayerBlacklisted(player.id, player.name)
     return player
 
 
-def get_top(key: str) -> tuple:
+def _from_record(id: str, check: Optional[str], record: Optional[dict], columns: tuple = ()) -> Player:
     """
-    Get the top 10 players from the database
+    Hydrates a player's record and checks the player
 
-    :param str key: Key to sort the player list by
-    :return:
-        - :top_players: A list of the top players
-        - :suffix: A suffix to be shown in the list
+    :param str id: The requested player's id
+    :param str check: Id of the component "owner"
+    :param dict record: The fetched record, None if nothing was found
+    :param tuple columns: Only use these columns of the record
+    :raises PlayerNotRegistered: in case the record is missing
+    :raises WrongPlayer: in case id and check don't match
+    :raises PlayerBlacklisted: in case the player is on the blacklist
     """
-    if key == "money":
-        top_records = database.fetchmany("SELECT * FROM players ORDER BY money DESC", size=15)
-        suffix = "$"
-    elif key == "miles":
-        top_records = database.fetchmany("SELECT * FROM players ORDER BY miles DESC", size=15)
-        suffix = " miles"
-    else:
-        top_records = database.fetchmany("SELECT * FROM players ORDER BY level DESC, xp DESC", size=15)
-        suffix = ""
-    top_players = []
-    for record in top_records:
-        top_players.append(Player(**record))
-    return top_players, suffix
+    if record is None:
+        raise PlayerNotRegistered(id)
+    if columns:
+        record = {column: record[column] for column in columns}
+    return _check(hydrate(record), check)
 
 
 def get_blacklisted() -> list[Player]:
@@ -292,7 +438,7 @@ def get_blacklisted() -> list[Player]:
     :return: A list of blacklisted players
     """
     records = database.fetchall("SELECT * FROM players WHERE xp=-1")
-    return [Player(**record) for record in records]
+    return [hydrate(record) for record in records]
 
 
 def registered(id: str) -> bool:
@@ -302,10 +448,7 @@ def registered(id: str) -> bool:
     :param int id: User id to check
     :return: A boolean indicating the registered state
     """
-    records = database.fetchall("SELECT * FROM players WHERE id=%s", (id,))
-    if len(records) == 1:
-        return True
-    return False
+    return database.fetchone("SELECT id FROM players WHERE id=%s", (id,)) is not None
 
 
 def get_count(table: str) -> int:
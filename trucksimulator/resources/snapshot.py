@@ -0,0 +1,83 @@
+"""
+objects.db compiled into a snapshot that is loaded with a single read instead of opening SQLite in every process.
+The snapshot stores the raw rows of all static tables together with a hash of the database it was compiled from,
+a snapshot that doesn't match the database anymore is ignored.
+
+Snapshots are compiled at build time by running this file, it only needs the standard library::
+
+    python trucksimulator/resources/snapshot.py trucksimulator/resources/objects.db
+"""
+import hashlib
+import marshal
+import os
+import sys
+from typing import Optional
+
+# increased whenever the layout of the snapshot changes
+FORMAT = 1
+TABLES = ("items", "places", "trucks")
+SUFFIX = ".snapshot"
+
+
+def _digest(database: str) -> str:
+    with open(database, "rb") as database_file:
+        return hashlib.sha256(database_file.read()).hexdigest()
+
+
+def read_tables(database: str) -> dict[str, list[tuple]]:
+    """
+    Reads all static tables from the database
+
+    :param str database: Path of the database file
+    :return: The rows of every table
+    """
+    # only imported when needed, processes using the snapshot don't load SQLite at all
+    import sqlite3  # pylint: disable=import-outside-toplevel
+
+    con = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        return {table: con.execute(f"SELECT * FROM {table}").fetchall() for table in TABLES}
+    finally:
+        con.close()
+
+
+def compile(database: str, snapshot: Optional[str] = None) -> str:  # pylint: disable=redefined-builtin
+    """
+    Compiles a database into a snapshot
+
+    :param str database: Path of the database file
+    :param str snapshot: Path of the snapshot, next to the database by default
+    :return: Path of the written snapshot
+    """
+    snapshot = snapshot or database + SUFFIX
+    data = {"format": FORMAT, "source": _digest(database), "tables": read_tables(database)}
+    with open(snapshot + ".tmp", "wb") as snapshot_file:
+        marshal.dump(data, snapshot_file)
+    # running processes never see a half written snapshot
+    os.replace(snapshot + ".tmp", snapshot)
+    return snapshot
+
+
+def load(database: str, snapshot: Optional[str] = None) -> Optional[dict[str, list[tuple]]]:
+    """
+    Loads the tables from a snapshot
+
+    :param str database: Path of the database file the snapshot has to match
+    :param str snapshot: Path of the snapshot, next to the database by default
+    :return: The rows of every table, None if there is no snapshot or it is outdated
+    """
+    try:
+        with open(snapshot or database + SUFFIX, "rb") as snapshot_file:
+            data = marshal.loads(snapshot_file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        return None
+    if data["source"] != _digest(database):
+        return None
+    return data["tables"]
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print(f"Compiled {path} into {compile(path)}")
@@ -0,0 +1,293 @@
+"""
+SQLite backend, runs the bot without a database server, e.g. for local benchmarks and small deployments.
+It is used with ``DATABASE_BACKEND=sqlite``, the database file is set with ``SQLITE_DATABASE``.
+
+Missing tables are created from the MySQL dump in database.sql, see :func:`translate_schema`. Queries are written for
+MySQL, their ``%s`` placeholders are translated to SQLite's ``?``. Everything else the queries use, window functions
+included, works the same in SQLite 3.25 and newer.
+
+The database runs in WAL mode, so readers never block the writer. Every thread keeps its own connections, SQLite
+connections are cheap to keep open but must not be shared between threads.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
+
+import trucksimulator.config as config
+from trucksimulator.resources.database import Backend
+
+# the first version with window functions
+MIN_VERSION = (3, 25, 0)
+
+_STATEMENT_END = re.compile(r";\s*$", re.MULTILINE)
+_CREATE_TABLE = re.compile(r"CREATE TABLE\s+`?(\w+)`?\s*\((.*)\)[^)]*$", re.DOTALL | re.IGNORECASE)
+_AUTO_INCREMENT = re.compile(r"(`?\w+`?)\s+\w+(?:\(\d+\))?\s.*\bAUTO_INCREMENT\b", re.IGNORECASE)
+_INDEX = re.compile(r"(UNIQUE\s+)?KEY\s+`?(\w+)`?\s*(\(.*\))", re.IGNORECASE)
+_COLLATE = re.compile(r"\s+COLLATE\s+(\w+)", re.IGNORECASE)
+_PLACEHOLDERS = re.compile(r"%([s%])")
+
+
+def _collation(match: re.Match) -> str:
+    # SQLite only knows binary and ASCII case insensitive collations
+    return " COLLATE NOCASE" if match.group(1).lower().endswith("_ci") else ""
+
+
+def translate_schema(dump: str) -> list[str]:
+    """
+    Translates a MySQL dump, as written by mysqldump, into SQLite statements. Tables and indexes are only created if
+    they don't exist, DROP TABLE statements are left out.
+
+    - ``AUTO_INCREMENT`` columns become ``INTEGER PRIMARY KEY AUTOINCREMENT``
+    - ``KEY`` and ``UNIQUE KEY`` definitions become separate indexes, prefixed with their table's name
+    - case insensitive collations become ``NOCASE``, others are dropped
+    - table options like ``ENGINE`` are dropped
+
+    :param str dump: The dump with one column or key definition per line
+    :return: The statements
+    """
+    statements = []
+    for statement in _STATEMENT_END.split(dump):
+        lines = [line for line in statement.splitlines() if line.strip() and not line.lstrip().startswith("--")]
+        statement = "\n".join(lines).strip()
+        if not statement or statement.upper().startswith(("DROP ", "LOCK ", "UNLOCK ", "/*!")):
+            continue
+        match = _CREATE_TABLE.match(statement)
+        if match is None:
+            statements.append(statement)
+            continue
+        table, body = match.groups()
+        definitions: list[str] = []
+        indexes: list[str] = []
+        auto_increment = False
+        for definition in (line.strip().rstrip(",") for line in body.splitlines()):
+            if not definition:
+                continue
+            if column := _AUTO_INCREMENT.match(definition):
+                definitions.append(f"{column.group(1)} INTEGER PRIMARY KEY AUTOINCREMENT")
+                auto_increment = True
+            elif definition.upper().startswith("PRIMARY KEY"):
+                if not auto_increment:
+                    definitions.append(definition)
+            elif index := _INDEX.match(definition):
+                unique, name, columns = index.groups()
+                indexes.append(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS `{table}_{name}` ON `{table}` {columns}"
+                )
+            else:
+                definitions.append(_COLLATE.sub(_collation, definition))
+        statements.append(f"CREATE TABLE IF NOT EXISTS `{table}` (\n  " + ",\n  ".join(definitions) + "\n)")
+        statements.extend(indexes)
+    return statements
+
+
+@lru_cache(maxsize=256)
+def translate(query: str) -> str:
+    """
+    :param str query: A query with MySQL placeholders
+    :return: The query with SQLite placeholders
+    """
+    return _PLACEHOLDERS.sub(lambda match: "?" if match.group(1) == "s" else "%", query)
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class Cursor:
+    """A cursor that behaves like a dictionary cursor of mysql.connector"""
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._cursor.close()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self) -> Optional[tuple]:
+        return self._cursor.description
+
+    def execute(self, query: str, args=None) -> None:
+        self._cursor.execute(translate(query), args or ())
+
+    def executemany(self, query: str, seq_args) -> None:
+        self._cursor.executemany(translate(query), seq_args)
+
+    def fetchone(self) -> Optional[dict]:
+        return self._cursor.fetchone()
+
+    def fetchall(self) -> list[dict]:
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: Optional[int] = None) -> list[dict]:
+        return self._cursor.fetchmany(size or 1)
+
+
+class Connection:
+    """A connection in autocommit mode, transactions are started explicitly like in mysql.connector"""
+
+    def __init__(self, con: sqlite3.Connection) -> None:
+        self._con = con
+
+    def cursor(self, **cursor_args) -> Cursor:
+        # rows are always dictionaries and always buffered
+        return Cursor(self._con.cursor())
+
+    def start_transaction(self) -> None:
+        # takes the write lock right away, a deferred transaction can't wait for it when upgrading later
+        self._con.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        self._con.execute("COMMIT")
+
+    def rollback(self) -> None:
+        self._con.execute("ROLLBACK")
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._con.close()
+
+
+class ThreadConnections:
+    """
+    The SQLite backend's pool, connections are cached per thread and reused by the thread that opened them.
+    There is no limit, SQLite lets one writer in at a time and makes the others wait.
+    """
+
+    def __init__(self, backend: "SQLiteBackend") -> None:
+        self.backend = backend
+        self._lock = threading.Lock()
+        # connections opened by a parent process, kept referenced so the child never closes them
+        self._inherited: list = []
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets all connections, used after forking"""
+        if hasattr(self, "_local"):
+            self._inherited.extend(getattr(self._local, "idle", ()))
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.connects = 0
+
+    def _idle(self) -> list:
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def acquire(self) -> Connection:
+        """
+        :return: An idle connection of the current thread or a new one
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            self.checkouts += 1
+        idle = self._idle()
+        if idle:
+            return idle.pop()
+        with self._lock:
+            self.connects += 1
+        return self.backend.connect()
+
+    def release(self, con: Connection, discard: bool = False) -> None:
+        """
+        Returns a connection to the current thread's cache
+
+        :param Connection con: The connection to return
+        :param bool discard: Close the connection instead of reusing it
+        """
+        if self._pid != os.getpid():
+            self._inherited.append(con)
+        elif discard:
+            con.close()
+        else:
+            self._idle().append(con)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and returns it afterwards"""
+        con = self.acquire()
+        try:
+            yield con
+        finally:
+            self.release(con)
+
+    def stats(self) -> dict:
+        """
+        :return: How often connections were checked out and opened
+        """
+        return {"checkouts": self.checkouts, "connects": self.connects}
+
+
+class SQLiteBackend(Backend):
+    """
+    A SQLite database file
+
+    :ivar str path: The database file
+    :ivar float timeout: Seconds a write waits for another connection's transaction
+    :ivar str schema: The MySQL dump missing tables are created from
+    """
+
+    error = sqlite3.Error
+
+    def __init__(self, path: str, timeout: float, schema: str = config.Database.SCHEMA) -> None:
+        if sqlite3.sqlite_version_info < MIN_VERSION:
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} is too old, at least 3.25 is required")
+        self.path = path
+        self.timeout = timeout
+        self.schema = schema
+        self._created = False
+        self._lock = threading.Lock()
+
+    def connect(self) -> Connection:
+        con = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        con.row_factory = _dict_row
+        con.execute("PRAGMA foreign_keys=ON")
+        # durable enough in WAL mode, a crash can only lose the last transactions
+        con.execute("PRAGMA synchronous=NORMAL")
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._create(con)
+                    self._created = True
+        return Connection(con)
+
+    def _create(self, con: sqlite3.Connection) -> None:
+        """Switches the database to WAL mode and creates missing tables, once per process"""
+        con.execute("PRAGMA journal_mode=WAL")
+        try:
+            with open(self.schema, encoding="utf-8") as schema_file:
+                statements = translate_schema(schema_file.read())
+        except FileNotFoundError:
+            if con.execute("SELECT COUNT(*) AS tables FROM sqlite_master WHERE type='table'").fetchone()["tables"]:
+                logging.debug("No schema at %s, using the existing tables of %s", self.schema, self.path)
+                return
+            raise
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in statements:
+                con.execute(statement)
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        logging.info("Using the SQLite database %s", self.path)
+
+    def create_pool(self) -> ThreadConnections:
+        return ThreadConnections(self)
@@ -0,0 +1,78 @@
+"""
+Most component rows look the same for every player, only the player id in the custom ids differs.
+They are built and serialized once per locale and cached as plain dicts with a placeholder for the owner's id,
+rendering a cached template only puts in the id.
+"""
+from typing import Any, Callable
+
+from flask_discord_interactions.models.component import Component
+
+from trucksimulator.resources import metrics, translations
+
+# stands in for the owner's id while a template is built
+OWNER = "\x1fowner\x1f"
+# the cache is dropped when it grows beyond this many templates
+MAX_TEMPLATES = 1024
+
+__templates__: dict[tuple, list[tuple[dict, bool]]] = {}
+
+
+class Rendered(Component):
+    """
+    An already serialized component, accepted everywhere a component is
+
+    :ivar dict data: The serialized component
+    """
+
+    def __init__(self, data: dict) -> None:
+        self.data = data
+
+    def dump(self) -> dict:
+        return self.data
+
+
+def _contains_owner(node: Any) -> bool:
+    if isinstance(node, str):
+        return OWNER in node
+    if isinstance(node, dict):
+        return any(_contains_owner(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_contains_owner(value) for value in node)
+    return False
+
+
+def _substitute(node: Any, owner: str) -> Any:
+    if isinstance(node, str):
+        return node.replace(OWNER, owner) if OWNER in node else node
+    if isinstance(node, dict):
+        return {key: _substitute(value, owner) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_substitute(value, owner) for value in node]
+    return node
+
+
+def render(name: str, build: Callable[..., list], owner: str = "", *args: Any) -> list[Rendered]:
+    """
+    Renders a cached template, builds it first if it isn't cached for the current locale yet
+
+    :param str name: Unique name of the template
+    :param Callable build: Builds the component rows, gets OWNER in place of the owner's id and the args
+    :param str owner: Id of the player the components belong to
+    :param args: Everything else the rows depend on, part of the cache key
+    :return: The rendered component rows
+    """
+    key = (name, translations.get_locale(), *args)
+    template = __templates__.get(key)
+    metrics.lookup("templates", template is not None)
+    if template is None:
+        template = [(data, _contains_owner(data)) for data in (row.dump() for row in build(OWNER, *args))]
+        if len(__templates__) >= MAX_TEMPLATES:
+            __templates__.clear()
+        __templates__[key] = template
+    # rows without the owner are shared, messages only read them
+    return [Rendered(_substitute(data, owner) if has_owner else data) for data, has_owner in template]
+
+
+def clear() -> None:
+    """Drops all cached templates, needed when the objects they show changed"""
+    __templates__.clear()
@@ -0,0 +1,105 @@
+"""
+Translations are compiled once at startup. Every locale file is flattened into a dict that maps dotted keys to the
+translated text, texts with ``%{placeholders}`` are turned into format strings beforehand, so a lookup is a dict
+access and a ``str.format_map``.
+
+The locale is kept in a context variable, set for every request. Concurrent requests in threaded workers don't
+overwrite each other's locale.
+"""
+import re
+from contextvars import ContextVar
+from typing import Optional, Union
+
+import yaml
+
+import trucksimulator.config as config
+
+_PLACEHOLDER = re.compile(r"%\{(\w+)\}")
+
+_locale: ContextVar[str] = ContextVar("locale", default=config.I18n.FALLBACK)
+
+
+class _Template(str):
+    """A translation with placeholders, stored as a format string"""
+
+    __slots__ = ()
+
+    def render(self, values: dict) -> str:
+        """
+        :param dict values: The placeholder values, missing ones are kept as they are
+        :return: The formatted translation
+        """
+        return self.format_map(_Values(values))
+
+
+class _Values(dict):
+    def __missing__(self, key: str) -> str:
+        return f"%{{{key}}}"
+
+
+def _compile(text: str) -> Union[str, _Template]:
+    if _PLACEHOLDER.search(text) is None:
+        return text
+    parts = _PLACEHOLDER.split(text)
+    # even parts are literal text, odd parts are placeholder names
+    return _Template(
+        "".join(
+            part.replace("{", "{{").replace("}", "}}") if i % 2 == 0 else "{" + part + "}"
+            for i, part in enumerate(parts)
+        )
+    )
+
+
+def _flatten(data: dict, prefix: str = ""):
+    for key, value in data.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", _compile(str(value))
+
+
+def _load(locale: str) -> dict[str, Union[str, _Template]]:
+    filename = config.I18n.FILENAME_FORMAT.format(locale=locale, format=".yml")
+    with open(f"{config.BASE_PATH}/locales/{filename}", encoding="utf-8") as locale_file:
+        return dict(_flatten(yaml.safe_load(locale_file) or {}))
+
+
+__tables__: dict[str, dict[str, Union[str, _Template]]] = {
+    locale: _load(locale) for locale in config.I18n.AVAILABLE_LOCALES
+}
+__fallback__ = __tables__[config.I18n.FALLBACK]
+
+
+def set_locale(locale: Optional[str]) -> None:
+    """
+    Sets the locale of the current request. Unknown locales fall back to config.I18n.FALLBACK on lookup.
+
+    :param str locale: The locale sent by Discord
+    """
+    _locale.set(locale or config.I18n.FALLBACK)
+
+
+def get_locale() -> str:
+    """
+    :return: The locale of the current request
+    """
+    return _locale.get()
+
+
+def t(key: str, locale: Optional[str] = None, **kwargs) -> str:
+    """
+    Translates a key
+
+    :param str key: The dotted translation key
+    :param str locale: Translate into this locale instead of the request's one
+    :param kwargs: Values for the placeholders
+    :return: The translation, the fallback locale's translation or the key itself if both are missing
+    """
+    text = __tables__.get(locale or _locale.get(), __fallback__).get(key)
+    if text is None:
+        text = __fallback__.get(key)
+        if text is None:
+            return key
+    if type(text) is _Template:  # pylint: disable=unidiomatic-typecheck
+        return text.render(kwargs)
+    return text
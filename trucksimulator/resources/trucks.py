@@ -1,38 +1,9 @@
 """
 Every player has a truck. For now these trucks are static.
 """
-import sqlite3
-from dataclasses import dataclass
-from trucksimulator import config
+from trucksimulator.resources import catalog
 
-
-def __generate_list(lst) -> None:
-    for tup in __cur__.fetchall():
-        lst.append(Truck(*tup))
-
-
-@dataclass
-class Truck:
-    """
-    :ivar int truck_id: Id of this Truck, in range of 0 ... best Truck
-    :ivar str name: Name of the Truck or the Trucks brand
-    :ivar str description: Description that is shown to the player
-    :ivar int price: Price the player has to pay to use this Truck
-    :ivar int gas_consumptions: Amount of Gas used per mile
-    :ivar int gas_capacity: Amount of gas the player can fill in the Truck
-    """
-
-    truck_id: int
-    name: str
-    description: str
-    price: int
-    gas_consumption: int
-    gas_capacity: int
-    loading_capacity: int
-    emoji: str
-
-    def __str__(self) -> str:
-        return self.emoji + " " + self.name
+Truck = catalog.Truck
 
 
 def get(truck_id: int) -> Truck:
@@ -43,27 +14,17 @@ def get(truck_id: int) -> Truck:
     :raises TruckNotFound: In case a truck with the requested id doesn't exist
     :return: The corresponding truck
     """
-    for truck in __all_trucks__:
-        if truck.truck_id == truck_id:
-            return truck
-    raise TruckNotFound()
+    truck = catalog.get().trucks_by_id.get(truck_id)
+    if truck is None:
+        raise TruckNotFound()
+    return truck
 
 
-def get_all() -> list[Truck]:
+def get_all() -> tuple[Truck, ...]:
     """
-    :return: A list containing all trucks
+    :return: All trucks
     """
-    return __all_trucks__
-
-
-__con__ = sqlite3.connect(config.BASE_PATH + "/resources/objects.db")
-__cur__ = __con__.cursor()
-
-__cur__.execute("SELECT * FROM trucks")
-__all_trucks__ = []
-__generate_list(__all_trucks__)
-
-__con__.close()
+    return catalog.get().trucks
 
 
 class TruckNotFound(Exception):
@@ -0,0 +1,190 @@
+"""
+The unit of work collects the changes made to database rows during an interaction.
+When the interaction is done, every changed row is written with a single UPDATE and the rows appended to a table are
+inserted with one batched INSERT, all of them in one transaction.
+If the interaction raises, the changes are dropped and the transaction is rolled back.
+Caches of the changed rows are dropped after the commit, see :func:`after_commit`.
+
+Outside of a unit of work changes are written immediately.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, NamedTuple, Optional
+
+from trucksimulator.resources import database
+
+_local = threading.local()
+
+
+class Increment(NamedTuple):
+    """
+    A pending relative change, written as ``column = column + delta``
+
+    :ivar int delta: The amount added to the column
+    """
+
+    delta: int
+
+
+class UnitOfWork:
+    """
+    Tracks dirty columns per row
+
+    :ivar dict changes: Maps (table, key column, key) to the changed columns and their database values or increments
+    :ivar dict inserts: Maps (table, columns) to the rows that should be inserted
+    :ivar list callbacks: Functions called once the changes are committed
+    """
+
+    def __init__(self) -> None:
+        self.changes: dict[tuple[str, str, Any], dict[str, Any]] = {}
+        self.inserts: dict[tuple[str, tuple[str, ...]], list[tuple]] = {}
+        self.callbacks: list[Callable[[], None]] = []
+
+    def register(self, table: str, key_column: str, key: Any, column: str, value: Any) -> None:
+        """
+        Marks a column as changed. A later change of the same column replaces the earlier one.
+
+        :param str table: The row's table
+        :param str key_column: The table's primary key column
+        :param key: The row's primary key
+        :param str column: The changed column
+        :param value: The new database-ready value
+        """
+        self.changes.setdefault((table, key_column, key), {})[column] = value
+
+    def register_increment(self, table: str, key_column: str, key: Any, column: str, delta: int) -> None:
+        """
+        Marks a column to be incremented on the server. Increments of the same column add up, an increment of a column
+        that already got a new value is added to that value.
+
+        :param str table: The row's table
+        :param str key_column: The table's primary key column
+        :param key: The row's primary key
+        :param str column: The changed column
+        :param int delta: The amount to add
+        """
+        columns = self.changes.setdefault((table, key_column, key), {})
+        if column not in columns:
+            columns[column] = Increment(delta)
+        elif isinstance(columns[column], Increment):
+            columns[column] = Increment(columns[column].delta + delta)
+        else:
+            columns[column] += delta
+
+    def take(self, table: str, key_column: str, key: Any, column: str) -> Any:
+        """
+        Removes a pending change of a column, used by statements that write the change themselves
+
+        :param str table: The row's table
+        :param str key_column: The table's primary key column
+        :param key: The row's primary key
+        :param str column: The column
+        :return: The pending database value or Increment, None if the column wasn't changed
+        """
+        columns = self.changes.get((table, key_column, key))
+        if not columns or column not in columns:
+            return None
+        value = columns.pop(column)
+        if not columns:
+            del self.changes[(table, key_column, key)]
+        return value
+
+    def append(self, table: str, columns: tuple[str, ...], row: tuple) -> None:
+        """
+        Queues a row to be inserted, rows of the same table and columns are inserted together
+
+        :param str table: The table
+        :param tuple columns: The inserted columns
+        :param tuple row: The database-ready values in column order
+        """
+        self.inserts.setdefault((table, columns), []).append(row)
+
+    def discard(self, table: str, key_column: str, key: Any) -> None:
+        """
+        Drops all pending changes of a row, used when the row is deleted
+
+        :param str table: The row's table
+        :param str key_column: The table's primary key column
+        :param key: The row's primary key
+        """
+        self.changes.pop((table, key_column, key), None)
+
+    def statements(self) -> list[tuple[str, tuple]]:
+        """
+        :return: One UPDATE statement with its arguments per changed row
+        """
+        statements = []
+        for (table, key_column, key), columns in self.changes.items():
+            assignments = ", ".join(
+                f"{column}={column}+%s" if isinstance(value, Increment) else f"{column}=%s"
+                for column, value in columns.items()
+            )
+            args = tuple(value.delta if isinstance(value, Increment) else value for value in columns.values())
+            statements.append((f"UPDATE {table} SET {assignments} WHERE {key_column}=%s", (*args, key)))
+        return statements
+
+    def batches(self) -> list[tuple[str, list[tuple]]]:
+        """
+        :return: One INSERT statement with its rows per table
+        """
+        return [
+            (f"INSERT INTO {table}({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})", rows)
+            for (table, columns), rows in self.inserts.items()
+        ]
+
+    def flush(self) -> None:
+        """
+        Writes all pending changes. A single statement outside a running transaction is sent on its own.
+        """
+        statements = self.statements()
+        batches = self.batches()
+        self.changes = {}
+        self.inserts = {}
+        standalone = len(statements) + len(batches) == 1 and not database.in_transaction()
+        for query, args in statements:
+            database.execute(query, args, standalone=standalone)
+        for query, rows in batches:
+            database.executemany(query, rows, standalone=standalone)
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Calls a function once the current unit of work is committed, right away if there is none.
+    A function registered more than once is called once, nothing is called if the unit of work is rolled back.
+
+    :param Callable callback: The function, e.g. one that drops a cache
+    """
+    running = current()
+    if running is None:
+        callback()
+    elif callback not in running.callbacks:
+        running.callbacks.append(callback)
+
+
+def current() -> Optional[UnitOfWork]:
+    """
+    :return: The unit of work of the current thread, None if there is none
+    """
+    return getattr(_local, "unit_of_work", None)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Runs the block in a unit of work. Changes are flushed and committed when the block is left.
+    Nested blocks join the outer unit of work.
+    """
+    running = current()
+    if running is not None:
+        yield running
+        return
+    running = _local.unit_of_work = UnitOfWork()
+    try:
+        with database.transaction():
+            yield running
+            running.flush()
+    finally:
+        _local.unit_of_work = None
+    # other threads could reload a cache from the old rows until the commit
+    for callback in running.callbacks:
+        callback()
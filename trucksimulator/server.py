@@ -0,0 +1,301 @@
+"The web app that is loaded into gunicorn"
+# pylint: disable=unused-argument
+import gc
+import logging
+import sys
+import traceback
+from time import perf_counter
+
+from trucksimulator import blueprints, config, guide
+from flask import Flask, g, json, request, send_file
+from flask_discord_interactions import Context, DiscordInteractions, Message
+from flask_discord_interactions.models.component import ActionRow, Button
+from flask_discord_interactions.models.embed import Embed, Footer
+from trucksimulator.resources.translations import set_locale, t
+from trucksimulator.resources import (
+    catalog,
+    content,
+    database,
+    deferral,
+    followups,
+    identity,
+    metrics,
+    players,
+    unitofwork,
+)
+from werkzeug.exceptions import HTTPException
+
+app = Flask(__name__)
+app.teardown_request(identity.clear)
+
+
+@app.route("/robots.txt")
+def get_robots():
+    return send_file(f"{config.BASE_PATH}/robots.txt")
+
+
+@app.route("/health")
+def health():
+    return "OK"
+
+
+def publish_stats() -> None:
+    """Publishes the stats of this worker's pool and executors"""
+    metrics.publish("database_pool", database.pool.stats())
+    metrics.publish("followups", followups.executor.stats())
+    metrics.publish("deferral", deferral.watchdog.stats())
+
+
+@app.after_request
+def publish_stats_after_request(response):
+    """Publishes the stats once per request, handlers running in their own context don't publish them again"""
+    publish_stats()
+    return response
+
+
+def run_measured(name: str, kind: str, queries: database.QueryStats, run):
+    """
+    Runs a handler in a unit of work, records its queries and latency
+
+    :param str name: The command or custom id
+    :param str kind: ``command`` or ``component``
+    :param database.QueryStats queries: Stats to record the queries to
+    :param Callable run: Runs the handler
+    """
+    start = perf_counter()
+    try:
+        with database.track_queries(queries), unitofwork.unit_of_work():
+            return run()
+    finally:
+        metrics.observe(metrics.INTERACTION_SECONDS, perf_counter() - start, kind=kind, name=name)
+        metrics.inc(metrics.DATABASE_QUERIES, queries.count, kind=kind, name=name)
+        metrics.inc(metrics.DATABASE_SECONDS, queries.time, kind=kind, name=name)
+
+
+class CustomDiscordInteractions(DiscordInteractions):
+    def handle_request(self):
+        set_locale(request.json.get("locale"))
+        catalog.refresh()
+        return super().handle_request()
+
+    def run_command(self, data: dict):
+        ctx = Context.from_data(self, app, data)
+        logging.info(
+            "%s#%s used /%s in guild %s with locale %s.",
+            ctx.author.username,
+            ctx.author.discriminator,
+            ctx.command_name,
+            ctx.guild_id,
+            ctx.locale,
+        )
+        run = super().run_command
+        queries = g.queries = database.QueryStats(f"/{ctx.command_name}")
+
+        def handler():
+            return run_measured(ctx.command_name, "command", queries, lambda: run(data))
+
+        return deferral.watchdog.run(ctx, handler, component=False)
+
+    def run_handler(self, data: dict, *, allow_modal: bool = True):
+        ctx = Context.from_data(self, app, data)
+        run = super().run_handler
+        queries = g.queries = database.QueryStats(ctx.primary_id)
+        deferrable = not getattr(self.custom_id_handlers.get(ctx.primary_id), deferral.IMMEDIATE, False)
+
+        def handler():
+            return run_measured(ctx.primary_id, "component", queries, lambda: run(data, allow_modal=allow_modal))
+
+        return deferral.watchdog.run(ctx, handler, component=True, deferrable=deferrable)
+
+
+discord = CustomDiscordInteractions(app)
+
+app.config["DISCORD_CLIENT_ID"] = config.Discord.CLIENT_ID
+app.config["DISCORD_BASE_URL"] = config.Discord.BASE_URL
+app.config["DISCORD_PUBLIC_KEY"] = config.Discord.PUBLIC_KEY
+app.config["DISCORD_CLIENT_SECRET"] = config.Discord.CLIENT_SECRET
+
+if "--debug" in sys.argv:
+    app.config["DONT_VALIDATE_SIGNATURE"] = True
+
+    @app.after_request
+    def add_query_stats(response):
+        """Shows the queries of an interaction when running locally"""
+        queries = g.get("queries")
+        if queries is not None:
+            response.headers["X-Database-Queries"] = json.dumps(queries.as_dict(breakdown=True))
+        return response
+
+
+def dump(message: Message) -> dict:
+    """Dumps a message as json to send raw data back to discord"""
+    return json.loads(message.encode()[0])
+
+
+@app.errorhandler(players.NotEnoughMoney)
+def not_enough_money(error):
+    """Error handler in case a player doesn't have enough money"""
+    metrics.inc(metrics.ERRORS, error="NotEnoughMoney")
+    return dump(Message(content=t("errors.not_enough_money.message"), ephemeral=True))
+
+
+@app.errorhandler(players.WrongPlayer)
+def not_driving(error):
+    """Defer buttons if the wrong player clicked them"""
+    metrics.inc(metrics.ERRORS, error="WrongPlayer")
+    required_permissions = [
+        10,
+        11,
+        31,
+    ]  # view_channels, send_messages, use_application_commands
+    if all([int(request.json.get("member").get("permissions")) & (1 << n) for n in required_permissions]):
+        return dump(
+            Message(
+                t("errors.not_driving.driving_allowed.message"),
+                ephemeral=True,
+                components=[
+                    ActionRow(
+                        components=[
+                            Button(
+                                label=t("errors.not_driving.driving_allowed.cta"),
+                                style=2,
+                                custom_id="initial_drive",
+                                emoji={"name": "logo_round", "id": 955233759278559273},
+                            )
+                        ]
+                    )
+                ],
+            )
+        )
+    return dump(Message(t("errors.not_driving.driving_forbidden.message"), ephemeral=True))
+
+
+@app.errorhandler(players.PlayerNotRegistered)
+def not_registered(error):
+    """Error handler in case a player isn't found in the database"""
+    metrics.inc(metrics.ERRORS, error="PlayerNotRegistered")
+    interaction_data = request.json
+    author = (
+        interaction_data.get("member").get("user").get("id")
+        if interaction_data.get("member", None)
+        else interaction_data.get("user").get("id")
+    )
+    if author == error.requested_id:
+        content = t("errors.not_registered.self.message", player_id=error.requested_id)
+        components = [
+            ActionRow(
+                components=[
+                    Button(
+                        label=t("errors.not_registered.self.cta"),
+                        custom_id=["profile_register", error.requested_id],
+                    )
+                ]
+            )
+        ]
+    else:
+        content = t("errors.not_registered.other.message", player_id=error.requested_id)
+        components = []
+
+    return dump(
+        Message(
+            content=content,
+            components=components,
+        )
+    )
+
+
+@app.errorhandler(players.PlayerBlacklisted)
+def blacklisted(error: players.PlayerBlacklisted):
+    """Error handler in case a player is on the blalist"""
+    metrics.inc(metrics.ERRORS, error="PlayerBlacklisted")
+    return dump(
+        Message(
+            t(
+                "errors.blacklisted.message",
+                player_id=error.requested_id,
+                reason=error.reason,
+            ),
+            ephemeral=True,
+        )
+    )
+
+
+@app.errorhandler(Exception)
+def general_error(error):
+    """Log any error to journal and to discord"""
+    metrics.inc(metrics.ERRORS, error="generic")
+    logging.error(error)
+    traceback.print_tb(error.__traceback__)
+    return dump(
+        Message(
+            embed=Embed(
+                title="Looks like we got an error here.",
+                description=f" ```py\n {error.__class__.__name__}: {error}```",
+                footer=Footer(
+                    text="If this occurs multiple times feel free to report it.",
+                    icon_url=config.SELF_AVATAR_URL,
+                ),
+                color=int("ff0000", 16),
+            ),
+            components=[
+                ActionRow(
+                    components=[
+                        Button(
+                            style=5,
+                            label="Support Server",
+                            url="https://discord.gg/FzAxtGTUhN",
+                        )
+                    ]
+                )
+            ],
+        )
+    )
+
+
+@app.errorhandler(HTTPException)
+def handle_exception(error):
+    """Return JSON instead of HTML for HTTP errors."""
+    # start with the correct headers and status code from the error
+    response = error.get_response()
+    # replace the body with JSON
+    response.data = json.dumps(
+        {
+            "code": error.code,
+            "name": error.name,
+            "description": error.description,
+        }
+    )
+    response.content_type = "application/json"
+    return response
+
+
+for blueprint in blueprints.get_global():
+    discord.register_blueprint(blueprint)
+
+
+@discord.command()
+def complain(ctx) -> str:
+    "No description."
+    return t("complain.response", locale=ctx.locale)
+
+
+discord.register_blueprint(blueprints.get_admin())
+
+
+discord.set_route("/interactions")
+
+
+def preload() -> None:
+    """
+    Loads everything workers share and freezes it, called in the gunicorn master before the workers are forked.
+    Frozen objects are never touched by the garbage collector, so their memory pages stay shared between the workers.
+    """
+    catalog.get()
+    for locale in config.I18n.AVAILABLE_LOCALES:
+        set_locale(locale)
+        for topic in ("", *(topic.name for topic in content.get_topics())):
+            guide.get_guide_selects(topic)
+    set_locale(None)
+    gc.collect()
+    gc.freeze()
+    logging.info("Preloaded the app, froze %s objects", gc.get_freeze_count())
@@ -1,5 +1,7 @@
 "Blueprint file containing all stat-related commands and handlers"
 # pylint: disable=unused-argument, missing-function-docstring
+from typing import Optional
+
 from trucksimulator import config
 from flask_discord_interactions import (
     ApplicationCommandType,
@@ -17,13 +19,15 @@ from flask_discord_interactions.models.component import (
 )
 from flask_discord_interactions.models.embed import Author, Field, Footer, Media
 from flask_discord_interactions.models.user import User
-from i18n import t
+from trucksimulator.resources.translations import t
 from trucksimulator.resources import (
     assets,
-    companies,
     components,
+    content,
+    leaderboard,
     levels,
     players,
+    templates,
     trucks,
 )
 from trucksimulator.utils import commatize, get_localizations
@@ -47,21 +51,16 @@ def register(ctx: Context, player_id: str):
         return Message(update=True, deferred=True)
     if players.registered(ctx.author.id):
         return Message(update=True, deferred=True)
-    with open(
-        config.BASE_PATH + f"/messages/{ctx.locale if ctx.locale in config.I18n.AVAILABLE_LOCALES else config.I18n.FALLBACK}/welcome.md",
-        "r",
-        encoding="utf8",
-    ) as welcome_file:
-        welcome_embed = Embed(
-            title=t("registering.title"),
-            description=welcome_file.read(),
-            color=config.EMBED_COLOR,
-            author=Author(
-                name=t("registering.welcome"),
-                icon_url=config.SELF_AVATAR_URL,
-            ),
-            footer=Footer(text=t("registering.footer"), icon_url=ctx.author.avatar_url),
-        )
+    welcome_embed = Embed(
+        title=t("registering.title"),
+        description=content.get_message("welcome", ctx.locale),
+        color=config.EMBED_COLOR,
+        author=Author(
+            name=t("registering.welcome"),
+            icon_url=config.SELF_AVATAR_URL,
+        ),
+        footer=Footer(text=t("registering.footer"), icon_url=ctx.author.avatar_url),
+    )
     rules_embed = Embed(title=t("registering.rules.title"), color=config.EMBED_COLOR, fields=[])
     rules_embed.fields.append(
         Field(
@@ -105,16 +104,17 @@ def register(ctx: Context, player_id: str):
 @profile_bp.custom_handler(custom_id="home")
 def profile_home(ctx: Context, player_id):
     """Shows your profile."""
-    player = players.get(ctx.author.id, check=player_id)
+    player = players.get_driving(ctx.author.id, check=player_id)
     return Message(
-        embed=get_profile_embed(ctx.author),
+        embed=get_profile_embed(ctx.author, player),
         components=components.get_home_buttons(player),
         update=True,
     )
 
 
-def get_profile_embed(user: User) -> Embed:
-    player: players.Player = players.get(user.id)
+def get_profile_embed(user: User, player: Optional[players.Player] = None) -> Embed:
+    if player is None:
+        player = players.get_driving(user.id)
     truck: trucks.Truck = trucks.get(player.truck_id)
     # Detect, when the player is renamed
     if player.name != user.username:
@@ -155,11 +155,9 @@ def get_profile_embed(user: User) -> Embed:
             )
         )
 
-    try:
-        company = companies.get(player.company)
+    company = player.get_company_header()
+    if company is not None:
         profile_embed.fields.append(Field(name=t("profile.company"), value=f"{company.logo} {company.name}"))
-    except companies.CompanyNotFound:
-        pass
     return profile_embed
 
 
@@ -178,8 +176,12 @@ def top_select(ctx: Context, player_id) -> Message:
     "Handler for the toplist select"
     if ctx.author.id != player_id:
         raise players.WrongPlayer()
+    if ctx.values[0] == "around":
+        embed = get_around_embed(players.get(player_id))
+    else:
+        embed = get_top_embed(ctx.values[0])
     return Message(
-        embed=get_top_embed(ctx.values[0]),
+        embed=embed,
         update=True,
         components=[Component.from_dict(c) for c in ctx.message.components],
     )
@@ -187,32 +189,53 @@ def top_select(ctx: Context, player_id) -> Message:
 
 def get_top_embed(key="level") -> Embed:
     "Returns the top embed"
-    top_players = players.get_top(key)
+    board = leaderboard.get(key)
     top_body = ""
     count = 0
     top_embed = Embed(title=t("top.title"), color=config.EMBED_COLOR, fields=[])
 
-    for player in top_players[0]:
+    for row in board.rows:
         if key == "money":
-            val = f"{player.money:,}"
+            val = f"{row.money:,}"
         elif key == "miles":
-            val = f"{player.miles:,}"
+            val = f"{row.miles:,}"
         else:
-            val = f"{player.level:,} ({player.xp:,}/{levels.get_next_xp(player.level):,} xp)"
+            val = f"{row.level:,} ({row.xp:,}/{levels.get_next_xp(row.level):,} xp)"
         count += 1
-        top_body += f"**{count}**. {player} ~ {val}{top_players[1]}\n"
+        top_body += f"**{count}**. {row} ~ {val}{board.suffix}\n"
     top_embed.fields.append(Field(name=t(f"top.fields.{key}"), value=top_body))
-    top_embed.footer = Footer(text=t("top.footer"), icon_url=config.SELF_AVATAR_URL)
+    top_embed.footer = Footer(
+        text=t("top.footer") + "\n" + t("top.updated", age=board.age, max_age=config.Caches.LEADERBOARD_MAX_AGE),
+        icon_url=config.SELF_AVATAR_URL,
+    )
     return top_embed
 
 
+def get_around_embed(player: players.Player) -> Embed:
+    "Returns the embed showing the players ranked around a player"
+    body = ""
+    for rank, row in leaderboard.around(player):
+        line = f"**{rank}**. {row} ~ {row.level:,} ({row.xp:,}/{levels.get_next_xp(row.level):,} xp)"
+        body += (f"__{line}__" if row.id == player.id else line) + "\n"
+    return Embed(
+        title=t("top.title"),
+        color=config.EMBED_COLOR,
+        fields=[Field(name=t("top.fields.around"), value=body)],
+        footer=Footer(text=t("top.footer"), icon_url=config.SELF_AVATAR_URL),
+    )
+
+
 def get_top_select(player):
     "Returns the select appearing below /top"
+    return templates.render("top_select", _build_top_select, player.id)
+
+
+def _build_top_select(player_id: str) -> list:
     return [
         ActionRow(
             components=[
                 SelectMenu(
-                    custom_id=["top_select", player.id],
+                    custom_id=["top_select", player_id],
                     placeholder=t("top.select"),
                     options=[
                         SelectMenuOption(
@@ -230,9 +253,14 @@ def get_top_select(player):
                             value="miles",
                             emoji={"name": "default_truck", "id": "861674264737087519"},
                         ),
+                        SelectMenuOption(
+                            label=t("top.keys.around"),
+                            value="around",
+                            emoji={"name": "📍", "id": None},
+                        ),
                     ],
                 )
             ]
         ),
-        ActionRow(components=[components.back_home(player.id)]),
+        ActionRow(components=[components.back_home(player_id)]),
     ]
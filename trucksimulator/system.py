@@ -12,8 +12,7 @@ from flask_discord_interactions import (
 )
 from flask_discord_interactions.models.component import ActionRow, Button, ButtonStyles
 from flask_discord_interactions.models.embed import Field, Media
-from i18n import set as set_i18n
-from i18n import t
+from trucksimulator.resources.translations import set_locale, t
 from trucksimulator.resources import players
 from trucksimulator.utils import get_localizations
 
@@ -82,7 +81,7 @@ def info(ctx: Context) -> Message:
 @system_bp.custom_handler(custom_id="refresh_system_info")
 def refresh(ctx: Context, locale: Optional[str] = None):
     if locale:
-        set_i18n("locale", locale)
+        set_locale(locale)
     return Message(
         embed=get_info_embed(),
         components=[Component.from_dict(c) for c in ctx.message.components],
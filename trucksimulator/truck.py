@@ -12,8 +12,8 @@ from flask_discord_interactions import (
 )
 from flask_discord_interactions.models.component import ActionRow, Button, ButtonStyles
 from flask_discord_interactions.models.embed import Author, Field, Media
-from i18n import t
-from trucksimulator.resources import assets, components, players, symbols, trucks
+from trucksimulator.resources.translations import t
+from trucksimulator.resources import assets, components, money, players, symbols, trucks
 from trucksimulator.utils import commatize
 
 truck_bp = DiscordInteractionsBlueprint()
@@ -73,7 +73,7 @@ def buy(ctx: Context, player_id: str, truck_id: int) -> Union[Message, str]:
     selling_price = round(old_truck.price - (old_truck.price / 10) * log(player.truck_miles + 1))
     end_price = new_truck.price - selling_price
     # this also adds money if the end price is negative
-    player.debit_money(end_price)
+    money.debit(player, end_price, money.REASON_TRUCK)
     player.truck_miles = 0
     player.gas = new_truck.gas_capacity
     player.truck_id = new_truck.truck_id
@@ -1,7 +1,8 @@
 """
 Some utility functions
 """
-import i18n
+from trucksimulator import config
+from trucksimulator.resources.translations import t
 
 
 def commatize(i: int) -> str:
@@ -19,6 +20,6 @@ def get_localizations(key: str) -> dict:
     Returns all localizations for a string
     """
     localizations = {}
-    for locale in i18n.get("available_locales"):
-        localizations[locale] = i18n.t(key, locale=locale)
+    for locale in config.I18n.AVAILABLE_LOCALES:
+        localizations[locale] = t(key, locale=locale)
     return localizations